@@ -1,6 +1,9 @@
 from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt
 from models import db, User, Ad, Review
+from listings import admin_listing_select, admin_user_select, admin_review_select, parse_limit
+from exports import export_response, EXPORT_MIMETYPES
+from cache import invalidate_ad_caches
 
 admin_bp = Blueprint('admin_api', __name__)
 
@@ -10,23 +13,52 @@ def check_if_admin():
         return {"error": "Вы не администратор"}, 403
     return None
 
+def admin_page(query, count_query, id_column, serialize):
+    """Newest-first keyset page: ?limit=&before_id=<last id of the previous page>.
+
+    The total is only counted for the first page; the client keeps it.
+    """
+    limit = parse_limit(request.args.get('limit'))
+    try:
+        before_id = int(request.args['before_id']) if 'before_id' in request.args else None
+    except ValueError:
+        before_id = limit = None
+    if limit is None:
+        return jsonify({"message": "Некорректный limit или before_id"}), 400
+
+    if before_id is not None:
+        query = query.where(id_column < before_id)
+    rows = db.session.execute(query.order_by(id_column.desc()).limit(limit + 1)).all()
+
+    return jsonify({
+        "items": [serialize(row) for row in rows[:limit]],
+        "has_more": len(rows) > limit,
+        "total": db.session.execute(count_query).scalar() if before_id is None else None
+    })
+
 @admin_bp.route('/admin/users', methods=['GET'])
 @jwt_required()
 def get_users():
     error = check_if_admin()
     if error: return jsonify(error[0]), error[1]
 
-    users = User.query.all()
-    result = []
-    for u in users:
-        result.append({
-            "id": u.id,
-            "name": u.name,
-            "email": u.email,
-            "is_admin": u.is_admin,
-            "ads_count": len(u.ads)
-        })
-    return jsonify(result)
+    query = admin_user_select()
+    count_query = db.select(db.func.count(User.id))
+    q = request.args.get('q', '').strip()
+    if q:
+        condition = db.or_(User.email.icontains(q, autoescape=True), User.name.icontains(q, autoescape=True))
+        query = query.where(condition)
+        count_query = count_query.where(condition)
+
+    return admin_page(query, count_query, User.id, lambda u: {
+        "id": u.id,
+        "name": u.name,
+        "email": u.email,
+        "is_admin": u.is_admin,
+        "ads_count": u.ads_count,
+        "reviews_count": u.rating_count,
+        "average_rating": round(u.rating_sum / u.rating_count, 1) if u.rating_count else 0
+    })
 
 @admin_bp.route('/admin/users/<int:user_id>/make_admin', methods=['PUT'])
 @jwt_required()
@@ -49,18 +81,23 @@ def make_user_admin(user_id):
 def get_all_ads():
     error = check_if_admin()
     if error: return jsonify(error[0]), error[1]
-    
-    ads = Ad.query.all()
-    result = []
-    for ad in ads:
-        result.append({
-            "id": ad.id,
-            "title": ad.title,
-            "price": ad.price,
-            "author_email": ad.author.email,
-            "created_date": ad.created_date.isoformat()
-        })
-    return jsonify(result)
+
+    query = admin_listing_select(Ad.status)
+    count_query = db.select(db.func.count(Ad.id))
+    q = request.args.get('q', '').strip()
+    if q:
+        condition = db.or_(Ad.title.icontains(q, autoescape=True), User.email.icontains(q, autoescape=True))
+        query = query.where(condition)
+        count_query = count_query.join(User, User.id == Ad.user_id).where(condition)
+
+    return admin_page(query, count_query, Ad.id, lambda row: {
+        "id": row.id,
+        "title": row.title,
+        "price": row.price,
+        "status": row.status,
+        "author_email": row.author_email,
+        "created_date": row.created_date.isoformat()
+    })
 
 @admin_bp.route('/admin/ads/<int:ad_id>', methods=['DELETE'])
 @jwt_required()
@@ -74,6 +111,7 @@ def delete_ad(ad_id):
 
     db.session.delete(ad)
     db.session.commit()
+    invalidate_ad_caches(ad_id)
     return jsonify({"message": "Объявление удалено"})
 
 @admin_bp.route('/admin/reviews', methods=['GET'])
@@ -82,29 +120,37 @@ def get_reviews():
     error = check_if_admin()
     if error: return jsonify(error[0]), error[1]
 
-    try:
-        reviews = Review.query.all()
-        result = []
-        for r in reviews:
-            author_name = r.author.name if r.author else "Неизвестный автор"
-            ad_title = "Объявление не указано"
-            if r.ad_id:
-                ad_info = Ad.query.get(r.ad_id)
-                if ad_info: ad_title = ad_info.title
-                else: ad_title = "Объявление удалено"
-            result.append({
-                "id": r.id,
-                "text": r.text or "",
-                "rating": r.rating,
-                "author": author_name,     
-                "ad_id": r.ad_id,
-                "ad_title": ad_title  
-            })
-        return jsonify(result)
-
-    except Exception as e:
-        print(f"Error in get_reviews: {e}")
-        return jsonify({"message": "Ошибка сервера", "error": str(e)}), 500
+    query = admin_review_select()
+    count_query = db.select(db.func.count(Review.id))
+    q = request.args.get('q', '').strip()
+    if q:
+        condition = db.or_(
+            Review.text.icontains(q, autoescape=True),
+            Ad.title.icontains(q, autoescape=True),
+            User.name.icontains(q, autoescape=True)
+        )
+        query = query.where(condition)
+        count_query = (
+            count_query
+            .outerjoin(User, User.id == Review.author_id)
+            .outerjoin(Ad, Ad.id == Review.ad_id)
+            .where(condition)
+        )
+
+    def serialize(r):
+        ad_title = "Объявление не указано"
+        if r.ad_id:
+            ad_title = r.ad_title or "Объявление удалено"
+        return {
+            "id": r.id,
+            "text": r.text or "",
+            "rating": r.rating,
+            "author": r.author_name or "Неизвестный автор",
+            "ad_id": r.ad_id,
+            "ad_title": ad_title
+        }
+
+    return admin_page(query, count_query, Review.id, serialize)
 
 @admin_bp.route('/admin/reviews/<int:review_id>', methods=['DELETE'])
 @jwt_required()
@@ -117,5 +163,28 @@ def delete_review(review_id):
         return jsonify({"message": "Отзыв не найден"}), 404
 
     db.session.delete(review)
+    User.adjust_rating(review.target_user_id, review.rating, -1)
     db.session.commit()
-    return jsonify({"message": "Отзыв удален"})
\ No newline at end of file
+    return jsonify({"message": "Отзыв удален"})
+
+ADMIN_EXPORTS = {
+    'users': lambda: admin_user_select(grouped_counts=True).order_by(User.id),
+    'ads': lambda: admin_listing_select(
+        Ad.user_id, Ad.price_unit, Ad.ad_type, Ad.category, Ad.district, Ad.status, Ad.views
+    ).order_by(Ad.id),
+    'reviews': lambda: admin_review_select().order_by(Review.id),
+}
+
+@admin_bp.route('/admin/export/<entity>', methods=['GET'])
+@jwt_required()
+def export_entity(entity):
+    error = check_if_admin()
+    if error: return jsonify(error[0]), error[1]
+
+    if entity not in ADMIN_EXPORTS:
+        return jsonify({"message": "Неизвестный тип выгрузки"}), 404
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in EXPORT_MIMETYPES:
+        return jsonify({"message": "Формат должен быть ndjson или csv"}), 400
+
+    return export_response(ADMIN_EXPORTS[entity](), entity, fmt)
@@ -1,8 +1,14 @@
 from flask import Blueprint, jsonify, request, g, current_app
-from models import Ad, AdPhoto, db, User
+from models import Ad, AdPhoto, db, User, favorites
+from search import build_match_query, search_ads
+from images import upload_folder, variant_filename, store_upload
+from cache import ad_list_cache, ad_detail_cache, facet_cache, invalidate_ad_caches
+from listings import (
+    listing_select, serialize_listing, encode_cursor, decode_cursor,
+    cursor_key, parse_limit, paginate, SORT_OPTIONS
+)
 from datetime import datetime
-import os
-import uuid
+from collections import Counter
 
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg'}
 MAX_TITLE_LEN = 200
@@ -12,47 +18,136 @@ MAX_DESC_LEN = 3000
 api_ads_bp = Blueprint('api_ads', __name__)
 
 
-def delete_file_from_disk(filename):
-    if not filename: return
-    try:
-        file_path = os.path.join(current_app.root_path, 'static', 'uploads', filename)
-        if os.path.exists(file_path):
-            os.remove(file_path)
-    except Exception as e:
-        print(f"Ошибка удаления файла: {e}")
+def conditional_json(payload):
+    response = jsonify(payload)
+    response.add_etag()
+    response.headers['Cache-Control'] = 'no-cache'
+    response.vary.add('Cookie')
+    return response.make_conditional(request)
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def parse_ad_filters(args):
+    filters = {
+        'ad_type': args.get('ad_type') or None,
+        'category': args.get('category') if args.get('category') != 'all' else None,
+        'district': args.get('district') if args.get('district') != 'all' else None,
+        'condition': args.get('condition') if args.get('condition') != 'all' else None,
+        'match_query': build_match_query(args.get('q')),
+    }
+    for name in ('price_min', 'price_max'):
+        value = args.get(name)
+        try:
+            filters[name] = float(value) if value not in (None, '') else None
+        except ValueError:
+            return None, f'Некорректный {name}'
+    return filters, None
+
+def apply_ad_filters(query, filters, exclude=()):
+    query = query.where(Ad.status == 'active')
+    if filters['match_query']:
+        query = search_ads(query, filters['match_query'])
+    for name in ('ad_type', 'category', 'district', 'condition'):
+        if filters[name] and name not in exclude:
+            query = query.where(getattr(Ad, name) == filters[name])
+    if filters['price_min'] is not None:
+        query = query.where(Ad.price >= filters['price_min'])
+    if filters['price_max'] is not None:
+        query = query.where(Ad.price <= filters['price_max'])
+    return query
+
 @api_ads_bp.route('/ads', methods=['GET'])
 def get_ads():
-    ad_type = request.args.get('ad_type')
-    category = request.args.get('category')
-    district = request.args.get('district')
+    filters, error = parse_ad_filters(request.args)
+    if error:
+        return jsonify({'error': error}), 400
+
+    sort = request.args.get('sort') or ('relevance' if filters['match_query'] else 'newest')
+    if sort not in SORT_OPTIONS or (sort == 'relevance' and not filters['match_query']):
+        return jsonify({'error': 'Некорректная сортировка'}), 400
+    sort_column, descending, parse_key = SORT_OPTIONS[sort]
+    sort_column = sort_column(filters)
+
+    limit = parse_limit(request.args.get('limit'))
+    if limit is None:
+        return jsonify({'error': 'Некорректный limit'}), 400
+
+    cursor = None
+    if request.args.get('cursor'):
+        cursor = decode_cursor(request.args['cursor'], parse_key)
+        if cursor is None:
+            return jsonify({'error': 'Некорректный cursor'}), 400
     
-    current_user = None
+    cache_key = tuple(sorted(request.args.items(multi=True)))
+    page = ad_list_cache.get(cache_key)
+    if page is None:
+        query = apply_ad_filters(listing_select(sort_column.label('sort_key')), filters)
+        rows = db.session.execute(paginate(query, sort_column, descending, cursor, limit)).all()
+
+        next_cursor = None
+        if len(rows) > limit:
+            last = rows[limit - 1]
+            next_cursor = encode_cursor(cursor_key(last.sort_key), last.id)
+
+        page = {'items': [serialize_listing(row) for row in rows[:limit]], 'next_cursor': next_cursor}
+        ad_list_cache.set(cache_key, page)
+
     user_id = g.current_user_id
     if user_id:
-        current_user = User.query.get(int(user_id))
+        liked_ids = User.favorite_ad_ids(int(user_id), (item['id'] for item in page['items']))
+        page = {
+            'items': [{**item, 'is_favorite': item['id'] in liked_ids} for item in page['items']],
+            'next_cursor': page['next_cursor']
+        }
 
-    query = Ad.query.filter_by(status='active')
-    
-    if ad_type:
-        query = query.filter_by(ad_type=ad_type)
-    if category and category != 'all':
-        query = query.filter_by(category=category)
-    if district and district != 'all':
-        query = query.filter_by(district=district)
-
-    ads = query.order_by(Ad.created_date.desc()).all()
-    response_list = []
-    
-    for ad in ads:
-        main_photo = ad.photos[0].image_filename if ad.photos else None
-        
-        is_favorite = False
-        if current_user:
-            is_favorite = current_user.has_liked(ad)
+    return conditional_json(page)
+
+@api_ads_bp.route('/ads/facets', methods=['GET'])
+def get_ad_facets():
+    filters, error = parse_ad_filters(request.args)
+    if error:
+        return jsonify({'error': error}), 400
+
+    cache_key = tuple(sorted(filters.items()))
+    facets = facet_cache.get(cache_key)
+    if facets is None:
+        query = apply_ad_filters(
+            db.select(Ad.category, Ad.district, db.func.count(Ad.id).label('count')),
+            filters,
+            exclude=('category', 'district')
+        ).group_by(Ad.category, Ad.district)
+
+        categories, districts, total = Counter(), Counter(), 0
+        for row in db.session.execute(query):
+            in_category = not filters['category'] or row.category == filters['category']
+            in_district = not filters['district'] or row.district == filters['district']
+            if in_district:
+                categories[row.category] += row.count
+            if in_category:
+                districts[row.district] += row.count
+            if in_category and in_district:
+                total += row.count
+
+        facets = {
+            'categories': [{'value': value, 'count': count} for value, count in categories.most_common()],
+            'districts': [{'value': value, 'count': count} for value, count in districts.most_common()],
+            'total': total,
+        }
+        facet_cache.set(cache_key, facets)
+
+    return jsonify(facets)
+
+@api_ads_bp.route('/ads/<int:id>', methods=['GET'])
+def get_ad(id):
+    ad_data = ad_detail_cache.get(id)
+    if ad_data is None:
+        ad = Ad.query.get(id)
+        if ad is None:
+            return jsonify({'error': 'Объявление не найдено'}), 404
+
+        all_photos = [p.image_filename for p in ad.photos]
+        main_photo = all_photos[0] if all_photos else None
 
         ad_data = {
             'id': ad.id,
@@ -62,53 +157,35 @@ def get_ads():
             'district': ad.district,
             'created_date': ad.created_date.isoformat() if ad.created_date else None,
             'main_photo': main_photo,
-            'is_favorite': is_favorite,
+            'thumbnail': variant_filename(main_photo, 'thumb'),
+            'is_favorite': False,
+            'description': ad.description,
+            'ad_type': ad.ad_type,
+            'condition': ad.condition,
+            'address': ad.address,
+            'views': ad.views or 0,
+            'status': ad.status,
+            'category': ad.category,
+            'user_id': ad.user_id,
+            'photos': all_photos,
+            'photos_medium': [variant_filename(p, 'medium') for p in all_photos],
+            'photos_thumb': [variant_filename(p, 'thumb') for p in all_photos]
         }
-        response_list.append(ad_data)
+        ad_detail_cache.set(id, ad_data)
 
-    return jsonify(response_list)
-
-@api_ads_bp.route('/ads/<int:id>', methods=['GET'])
-def get_ad(id):
-    current_user = None
     user_id = g.current_user_id
-    if user_id:
-        current_user = User.query.get(int(user_id))
-
-    ad = Ad.query.get(id)
-    if ad is None:
-        return jsonify({'error': 'Объявление не найдено'}), 404
-    ad.views += 1
-    db.session.commit()
+    view_counter = current_app.extensions['view_counter']
+    view_counter.record(id, viewer=user_id or request.remote_addr)
 
     is_favorite = False
-    if current_user:
-        is_favorite = current_user.has_liked(ad)
-
-    all_photos = [p.image_filename for p in ad.photos]
-    main_photo = all_photos[0] if all_photos else None
-
-    ad_data = {
-        'id': ad.id,
-        'title': ad.title,
-        'price': ad.price,
-        'price_unit': ad.price_unit,
-        'district': ad.district,
-        'created_date': ad.created_date.isoformat() if ad.created_date else None,
-        'main_photo': main_photo,
-        'is_favorite': is_favorite,
-        'description': ad.description,
-        'ad_type': ad.ad_type,
-        'condition': ad.condition,
-        'address': ad.address,
-        'views': ad.views,
-        'status': ad.status,
-        'category': ad.category,
-        'user_id': ad.user_id,
-        'photos': all_photos
-    }
+    if user_id:
+        is_favorite = id in User.favorite_ad_ids(int(user_id), [id])
 
-    return jsonify(ad_data)
+    return conditional_json({
+        **ad_data,
+        'is_favorite': is_favorite,
+        'views': ad_data['views'] + view_counter.pending(id)
+    })
 
 @api_ads_bp.route('/ads', methods=['POST'])
 def create_ad():
@@ -176,6 +253,7 @@ def create_ad():
                 db.session.add(photo)
 
         db.session.commit()
+        invalidate_ad_caches()
         return jsonify({'id': new_ad.id, 'message': 'Создано'}), 201
 
     except Exception as e:
@@ -245,7 +323,6 @@ def edit_ad(id):
 
             for photo in current_photos:
                 if photo.image_filename not in new_filenames:
-                    delete_file_from_disk(photo.image_filename)
                     db.session.delete(photo)
 
             existing_filenames = {p.image_filename for p in current_photos}
@@ -253,7 +330,10 @@ def edit_ad(id):
                 if filename not in existing_filenames:
                     db.session.add(AdPhoto(image_filename=filename, ad_id=ad.id))
 
+        # Files no longer referenced are left to `flask gc-uploads`: with
+        # content-addressed names another upload may already point at them.
         db.session.commit()
+        invalidate_ad_caches(ad.id)
         return jsonify({'message': 'Обновлено', 'id': ad.id})
 
     except Exception as e:
@@ -272,11 +352,9 @@ def delete_ad(id):
     if ad.user_id != int(user_id): return jsonify({'error': 'Нет прав'}), 403
 
     try:
-        for photo in ad.photos:
-            delete_file_from_disk(photo.image_filename)
-        
         db.session.delete(ad)
         db.session.commit()
+        invalidate_ad_caches(id)
         return '', 204
     except Exception as e:
         db.session.rollback()
@@ -288,17 +366,16 @@ def upload_image():
     file = request.files['file']
     if file.filename == '': return jsonify({'error': 'Файл не выбран'}), 400
 
-    if file and allowed_file(file.filename):
-        ext = file.filename.rsplit('.', 1)[1].lower()
-        unique_filename = f"{uuid.uuid4().hex}.{ext}"
-        
-        path = os.path.join(current_app.root_path, 'static', 'uploads')
-        os.makedirs(path, exist_ok=True)
-        file.save(os.path.join(path, unique_filename))
-        
-        return jsonify({'filename': unique_filename}), 201
-    
-    return jsonify({'error': 'Неверный формат'}), 400
+    if not allowed_file(file.filename):
+        return jsonify({'error': 'Неверный формат'}), 400
+
+    filename, created = store_upload(file.stream, upload_folder())
+    if filename is None:
+        return jsonify({'error': 'Файл не является изображением PNG или JPEG'}), 400
+    if created:
+        current_app.extensions['image_processor'].submit(filename)
+
+    return jsonify({'filename': filename}), 201
 
 @api_ads_bp.route('/ads/<int:id>/favorite', methods=['POST'])
 def toggle_favorite(id):
@@ -326,23 +403,12 @@ def get_favorites():
     user_id = g.current_user_id
     if not user_id: return jsonify({'error': 'Нужна авторизация'}), 401
 
-    user = User.query.get(int(user_id))
-    favorite_ads = user.saved_ads.all()
-    response_list = []
-    for ad in favorite_ads:
-        main_photo = ad.photos[0].image_filename if ad.photos else None
-        is_favorite = True 
-
-        ad_data = {
-            'id': ad.id,
-            'title': ad.title,
-            'price': ad.price,
-            'price_unit': ad.price_unit,
-            'district': ad.district,
-            'created_date': ad.created_date.isoformat() if ad.created_date else None,
-            'main_photo': main_photo,
-            'is_favorite': is_favorite
-        }
-        response_list.append(ad_data)
+    query = (
+        listing_select()
+        .join(favorites, favorites.c.ad_id == Ad.id)
+        .where(favorites.c.user_id == int(user_id))
+    )
+    rows = db.session.execute(query).all()
 
+    response_list = [serialize_listing(row, True) for row in rows]
     return jsonify(response_list)
\ No newline at end of file
@@ -1,8 +1,11 @@
-from flask import Flask, g, send_from_directory
+from flask import Flask, abort, g, jsonify, request, send_from_directory
 from flask_sqlalchemy import SQLAlchemy
+from flask_migrate import Migrate, upgrade
 from flask_jwt_extended import JWTManager, verify_jwt_in_request, get_jwt_identity
 from datetime import timedelta
-from models import db, TokenBlocklist, Ad, AdPhoto, User 
+from werkzeug.middleware.proxy_fix import ProxyFix
+from models import db, Ad, AdPhoto, User 
+import mimetypes
 import os
 
 from auth import auth_bp
@@ -10,14 +13,32 @@ from ads import api_ads_bp
 from messages import api_messages_bp
 from reviews import api_reviews_bp
 from admin import admin_bp
+from events import api_events_bp, InProcessBroker
+from commands import register_commands
+from view_counter import ViewCounter
+from blocklist import TokenBlocklistCache
+from search import include_in_migrations
+from images import ImageProcessor, upload_folder, resolve_upload
+from database import database_uri, engine_options, env_flag, env_int, replica_binds, ReplicaRouter
+from profiling import RequestProfiler
 
 app = Flask(__name__, static_folder='static_dist', static_url_path='/')
+# Number of reverse proxies in front of the app (nginx serving uploads via
+# X-Accel-Redirect, a load balancer...). Without it request.remote_addr is
+# the proxy's address, and anonymous view deduplication treats every
+# visitor as one. Leave at 0 when clients connect directly: the
+# X-Forwarded-* headers would then be client-controlled.
+PROXY_FIX_HOPS = env_int('PROXY_FIX_HOPS', 0)
+if PROXY_FIX_HOPS:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=PROXY_FIX_HOPS, x_proto=PROXY_FIX_HOPS, x_host=PROXY_FIX_HOPS)
 basedir = os.path.abspath(os.path.dirname(__file__))
 db_path = os.path.join(basedir, 'instance', 'webproject.db')
-app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
+app.config['SQLALCHEMY_DATABASE_URI'] = database_uri(f'sqlite:///{db_path}')
 
 app.config['SECRET_KEY'] = 'my-secret-key-123456' 
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
+app.config['SQLALCHEMY_BINDS'] = replica_binds(os.environ.get('DATABASE_REPLICA_URL'))
 
 app.config["JWT_SECRET_KEY"] = "secret-jwt-key-1234"
 app.config["JWT_ACCESS_TOKEN_EXPIRES"] = timedelta(minutes=15)
@@ -26,17 +47,37 @@ app.config["JWT_REFRESH_TOKEN_EXPIRES"] = timedelta(days=7)
 app.config["JWT_TOKEN_LOCATION"] = ["cookies"] 
 app.config["JWT_COOKIE_CSRF_PROTECT"] = False
 
+app.config['MAX_CONTENT_LENGTH'] = env_int('MAX_UPLOAD_BYTES', 10 * 1024 * 1024)
+
+app.config['USE_X_SENDFILE'] = env_flag('USE_X_SENDFILE', False)
+app.config['UPLOADS_ACCEL_REDIRECT_PREFIX'] = os.environ.get('UPLOADS_ACCEL_REDIRECT_PREFIX') or None
+UPLOAD_CACHE_MAX_AGE = 365 * 24 * 60 * 60
+
+# Keep well below GUNICORN_WORKER_CONNECTIONS: the remaining slots serve
+# every other request.
+app.config['SSE_MAX_CONNECTIONS'] = env_int('SSE_MAX_CONNECTIONS', 800)
+
+app.config['PROFILING_ENABLED'] = os.environ.get('PROFILING_ENABLED') == '1'
+
 db.init_app(app)
+ReplicaRouter(app)
+RequestProfiler(app)
+migrate = Migrate(app, db, render_as_batch=True, include_name=include_in_migrations)
 jwt = JWTManager(app)
+app.extensions['broker'] = InProcessBroker()
+ViewCounter(app)
+blocklist_cache = TokenBlocklistCache(app)
+ImageProcessor(app)
 
 @jwt.token_in_blocklist_loader
 def check_token(jwt_header, jwt_payload):
-    jti = jwt_payload["jti"]
-    token = TokenBlocklist.query.filter_by(jti=jti).first()
-    return token is not None
+    return blocklist_cache.is_revoked(jwt_payload)
 
 @app.before_request
 def load_user_from_jwt():
+    if not request.path.startswith('/api/'):
+        g.current_user_id = None
+        return
     try:
         verify_jwt_in_request(optional=True)
         user_id = int(get_jwt_identity())
@@ -58,14 +99,37 @@ def add_claims_to_access_token(identity):
 def index():
     return app.send_static_file("index.html")
 
+@app.errorhandler(413)
+def request_too_large(e):
+    limit_mb = round(app.config['MAX_CONTENT_LENGTH'] / (1024 * 1024), 1)
+    return jsonify({'error': f'Файл слишком большой (макс. {limit_mb:g} МБ)'}), 413
+
 @app.errorhandler(404)
 def not_found(e):
     return app.send_static_file("index.html")
 
 @app.route('/static/uploads/<path:filename>')
 def serve_uploads(filename):
-    uploads_folder = os.path.join(app.root_path, 'static', 'uploads')
-    return send_from_directory(uploads_folder, filename)
+    uploads_folder = upload_folder(app)
+    path, is_fallback = resolve_upload(uploads_folder, filename)
+    if path is None:
+        abort(404)
+
+    accel_prefix = app.config['UPLOADS_ACCEL_REDIRECT_PREFIX']
+    if accel_prefix:
+        response = app.response_class(mimetype=mimetypes.guess_type(path)[0] or 'application/octet-stream')
+        response.headers['X-Accel-Redirect'] = f"{accel_prefix.rstrip('/')}/{path.replace(os.sep, '/')}"
+    else:
+        response = send_from_directory(uploads_folder, path)
+
+    response.cache_control.no_cache = None
+    response.cache_control.public = True
+    if is_fallback:
+        response.cache_control.max_age = 60
+    else:
+        response.cache_control.max_age = UPLOAD_CACHE_MAX_AGE
+        response.cache_control.immutable = True
+    return response
 
 
 
@@ -74,8 +138,11 @@ app.register_blueprint(api_ads_bp, url_prefix='/api')
 app.register_blueprint(api_messages_bp, url_prefix='/api') 
 app.register_blueprint(api_reviews_bp, url_prefix='/api')
 app.register_blueprint(admin_bp, url_prefix='/api')
+app.register_blueprint(api_events_bp, url_prefix='/api')
+
+register_commands(app)
 
 if __name__ == '__main__':
     with app.app_context():
-        db.create_all()
-    app.run(debug=True, host='0.0.0.0')
\ No newline at end of file
+        upgrade()
+    app.run(debug=os.environ.get('FLASK_DEBUG') == '1', host='0.0.0.0', threaded=True)
\ No newline at end of file
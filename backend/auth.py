@@ -1,10 +1,10 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import (
     create_access_token, create_refresh_token, 
     get_jwt_identity, get_jwt, jwt_required, decode_token
 )
 from werkzeug.security import generate_password_hash, check_password_hash
-from models import User, TokenBlocklist, db
+from models import User, db
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -86,14 +86,13 @@ def refresh():
 @auth_bp.route('/logout', methods=['POST'])
 @jwt_required()
 def logout():
-    jti = get_jwt()["jti"]
-    db.session.add(TokenBlocklist(jti=jti))
+    blocklist_cache = current_app.extensions['token_blocklist_cache']
+    blocklist_cache.revoke(get_jwt())
 
     refresh_cookie = request.cookies.get('refresh_token_cookie')
     if refresh_cookie:
         try:
-            decoded = decode_token(refresh_cookie)
-            db.session.add(TokenBlocklist(jti=decoded['jti']))
+            blocklist_cache.revoke(decode_token(refresh_cookie))
         except Exception:
             pass
 
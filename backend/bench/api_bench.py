@@ -0,0 +1,354 @@
+"""Latency and query-count benchmark for the API hot paths.
+
+Seeds a synthetic SQLite database (reused on later runs unless --reseed
+is given), then measures /api/ads, /api/ads/<id>, /api/chats,
+/api/chats/<ad>/<partner>, /api/favorites and /api/users/<id>/reviews in
+two phases:
+
+  * sequentially through the Flask test client (--requests per endpoint);
+  * concurrently over HTTP against an in-process threaded server, or
+    against --url if given (--concurrency clients for --duration seconds).
+
+p50/p95/p99 latency, throughput and SQL statements per request (taken
+from the X-Query-Count header of the profiling middleware) are printed
+and written to bench/results/<commit>-<time>.json. Pass --compare with an
+earlier results file to print the change per endpoint.
+
+    python bench/api_bench.py --ads 20000 --messages 50000
+    python bench/api_bench.py --compare bench/results/1a2b3c4-20261018-120000.json
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlencode, urlsplit
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+BENCH_PASSWORD = 'bench-password'
+BENCH_EMAIL_DOMAIN = 'bench.local'
+BENCH_LOGIN = f'seed1@{BENCH_EMAIL_DOMAIN}'
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(latencies, queries, elapsed):
+    latencies = sorted(latencies)
+    return {
+        'requests': len(latencies),
+        'rps': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'queries_per_request': round(sum(queries) / len(queries), 2) if queries else None,
+    }
+
+
+def seed(app, args):
+    from flask_migrate import upgrade
+    from werkzeug.security import generate_password_hash
+    from models import db, User, Ad, Message, Review, favorites
+    from bulk_import import import_ads, synthetic_ads, SEED_WORDS
+
+    rng = random.Random(args.seed)
+    now = datetime.now(timezone.utc)
+
+    def moment():
+        return now - timedelta(seconds=rng.randint(0, 365 * 24 * 3600))
+
+    with app.app_context():
+        upgrade()
+        hashed_password = generate_password_hash(BENCH_PASSWORD)
+        # Users get ids 1..N up front (user 1 is the admin the benchmark
+        # logs in as); the ads then go through the same importer as
+        # `flask seed`, which finds these users by email.
+        db.session.execute(db.insert(User), [{
+            'id': user_id,
+            'name': f'seed{user_id}',
+            'last_name': 'bench',
+            'email': f'seed{user_id}@{BENCH_EMAIL_DOMAIN}',
+            'hashed_password': hashed_password,
+            'created_date': moment(),
+            'is_admin': user_id == 1,
+        } for user_id in range(1, args.users + 1)])
+        db.session.commit()
+
+        import_ads(
+            synthetic_ads(args.ads, args.users, BENCH_EMAIL_DOMAIN, photos_per_ad=args.photos, seed=args.seed),
+            hashed_password
+        )
+        ad_owner = dict(db.session.execute(db.select(Ad.id, Ad.user_id)).all())
+        ad_ids = list(ad_owner)
+
+        rows = []
+        for _ in range(args.messages):
+            ad_id = rng.choice(ad_ids)
+            owner = ad_owner[ad_id]
+            # A third of the traffic involves user 1, the account the
+            # benchmark logs in as, so its chat list is realistically long.
+            partner = 1 if rng.random() < 0.33 else rng.randint(1, args.users)
+            if partner == owner:
+                partner = owner % args.users + 1
+            sender, recipient = (partner, owner) if rng.random() < 0.5 else (owner, partner)
+            rows.append({'body': ' '.join(rng.choices(SEED_WORDS, k=8)), 'created_date': moment(),
+                         'sender_id': sender, 'recipient_id': recipient, 'ad_id': ad_id})
+        db.session.execute(db.insert(Message), rows)
+
+        rows = []
+        for _ in range(args.reviews):
+            ad_id = rng.choice(ad_ids)
+            author = rng.randint(1, args.users)
+            if author == ad_owner[ad_id]:
+                continue
+            rows.append({'rating': rng.randint(1, 5), 'text': ' '.join(rng.choices(SEED_WORDS, k=12)),
+                         'created_date': moment(), 'author_id': author,
+                         'target_user_id': ad_owner[ad_id], 'ad_id': ad_id})
+        if rows:
+            db.session.execute(db.insert(Review), rows)
+        User.recalculate_ratings()
+
+        pairs = {(rng.randint(1, args.users), rng.choice(ad_ids)) for _ in range(args.favorites)}
+        pairs |= {(1, rng.choice(ad_ids)) for _ in range(min(200, args.ads))}
+        db.session.execute(favorites.insert(), [{'user_id': u, 'ad_id': a} for u, a in pairs])
+        db.session.commit()
+
+
+def build_workload(app, rng):
+    from models import db, Message, Review
+    from bulk_import import SEED_DISTRICTS, SEED_WORDS
+
+    with app.app_context():
+        ad_ids = db.session.execute(db.select(Message.ad_id).distinct().limit(500)).scalars().all()
+        threads = db.session.execute(
+            db.select(Message.ad_id, Message.recipient_id).where(Message.sender_id == 1).distinct().limit(200)
+        ).all()
+        reviewed = db.session.execute(
+            db.select(Review.target_user_id).distinct().limit(200)
+        ).scalars().all()
+
+    def feed_url():
+        params = {'limit': 20, 'sort': rng.choice(['newest', 'price_asc', 'price_desc', 'views'])}
+        name, value = rng.choice([
+            (None, None), ('ad_type', 'item'), ('ad_type', 'service'),
+            ('district', rng.choice(SEED_DISTRICTS)), ('q', rng.choice(SEED_WORDS)),
+        ])
+        if name:
+            params[name] = value
+        return '/api/ads?' + urlencode(params)
+
+    return {
+        'ads': feed_url,
+        'ad_detail': lambda: f'/api/ads/{rng.choice(ad_ids)}',
+        'chats': lambda: '/api/chats?limit=50',
+        'chat_thread': lambda: '/api/chats/{}/{}?limit=50'.format(*rng.choice(threads)),
+        'favorites': lambda: '/api/favorites',
+        'user_reviews': lambda: f'/api/users/{rng.choice(reviewed)}/reviews',
+    }
+
+
+def run_test_client(app, workload, args):
+    from cache import invalidate_ad_caches
+
+    client = app.test_client()
+    login = client.post('/api/auth/login', json={'email': BENCH_LOGIN, 'password': BENCH_PASSWORD})
+    if login.status_code != 200:
+        raise SystemExit(f'Не удалось войти: {login.status_code}')
+
+    results = {}
+    for name, next_url in workload.items():
+        latencies, queries = [], []
+        started = time.perf_counter()
+        for _ in range(args.requests):
+            if args.cold:
+                invalidate_ad_caches()
+            request_started = time.perf_counter()
+            response = client.get(next_url())
+            latencies.append(time.perf_counter() - request_started)
+            if response.status_code != 200:
+                raise SystemExit(f'{name}: {response.request.path} -> {response.status_code}')
+            if 'X-Query-Count' in response.headers:
+                queries.append(int(response.headers['X-Query-Count']))
+        results[name] = summarize(latencies, queries, time.perf_counter() - started)
+    return results
+
+
+def http_login(base):
+    conn = http.client.HTTPConnection(base.hostname, base.port or 80, timeout=30)
+    conn.request('POST', '/api/auth/login',
+                 json.dumps({'email': BENCH_LOGIN, 'password': BENCH_PASSWORD}),
+                 {'Content-Type': 'application/json'})
+    response = conn.getresponse()
+    response.read()
+    for header, value in response.getheaders():
+        if header.lower() == 'set-cookie' and value.startswith('access_token_cookie='):
+            return value.split(';', 1)[0]
+    raise SystemExit(f'Не удалось войти: {response.status}')
+
+
+def run_http(base, workload, args):
+    cookie = http_login(base)
+    lock = threading.Lock()
+    samples = {name: ([], []) for name in workload}
+    errors = []
+    deadline = time.perf_counter() + args.duration
+
+    def client(worker):
+        rng = random.Random(args.seed + worker)
+        names = list(workload)
+        conn = http.client.HTTPConnection(base.hostname, base.port or 80, timeout=30)
+        while time.perf_counter() < deadline:
+            name = rng.choice(names)
+            url = workload[name]()
+            started = time.perf_counter()
+            try:
+                conn.request('GET', url, headers={'Cookie': cookie})
+                response = conn.getresponse()
+                response.read()
+            except (OSError, http.client.HTTPException) as e:
+                conn.close()
+                conn = http.client.HTTPConnection(base.hostname, base.port or 80, timeout=30)
+                with lock:
+                    errors.append(f'{url}: {e}')
+                continue
+            elapsed = time.perf_counter() - started
+            with lock:
+                if response.status != 200:
+                    errors.append(f'{url}: {response.status}')
+                    continue
+                samples[name][0].append(elapsed)
+                if response.getheader('X-Query-Count'):
+                    samples[name][1].append(int(response.getheader('X-Query-Count')))
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    results = {name: summarize(latencies, queries, elapsed) for name, (latencies, queries) in samples.items()}
+    all_latencies = [value for latencies, _ in samples.values() for value in latencies]
+    all_queries = [value for _, queries in samples.values() for value in queries]
+    results['total'] = summarize(all_latencies, all_queries, elapsed)
+    results['total']['errors'] = len(errors)
+    for error in errors[:5]:
+        print(f'  ошибка: {error}')
+    return results
+
+
+def serve_in_background(app):
+    from werkzeug.serving import make_server
+
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCH_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def print_table(title, results, baseline=None):
+    print(f'\n{title}')
+    print(f"  {'endpoint':<14}{'req':>7}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'q/req':>8}")
+    for name, row in results.items():
+        line = (f"  {name:<14}{row['requests']:>7}{row['rps']:>9}{row['p50_ms']:>9}"
+                f"{row['p95_ms']:>9}{row['p99_ms']:>9}{row['queries_per_request'] or '-':>8}")
+        old = (baseline or {}).get(name)
+        if old and old['p95_ms']:
+            line += f"   p95 {(row['p95_ms'] - old['p95_ms']) / old['p95_ms']:+.0%}"
+        if old and old['rps']:
+            line += f"  req/s {(row['rps'] - old['rps']) / old['rps']:+.0%}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--db', default=os.path.join(tempfile.gettempdir(), 'webproject-bench.db'))
+    parser.add_argument('--reseed', action='store_true')
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--ads', type=int, default=20000)
+    parser.add_argument('--photos', type=int, default=3, help='фото на объявление')
+    parser.add_argument('--messages', type=int, default=50000)
+    parser.add_argument('--reviews', type=int, default=5000)
+    parser.add_argument('--favorites', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--requests', type=int, default=200, help='запросов на эндпоинт через test client')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--url', help='нагружать уже запущенный сервер вместо встроенного')
+    parser.add_argument('--cold', action='store_true', help='сбрасывать кэши ответов перед каждым запросом')
+    parser.add_argument('--skip-http', action='store_true')
+    parser.add_argument('--compare', help='JSON с результатами предыдущего запуска')
+    parser.add_argument('--output', default=os.path.join(BENCH_DIR, 'results'))
+    args = parser.parse_args()
+
+    if args.reseed and os.path.exists(args.db):
+        os.remove(args.db)
+    needs_seed = not os.path.exists(args.db)
+    os.environ['DATABASE_URL'] = f'sqlite:///{os.path.abspath(args.db)}'
+    os.environ['PROFILING_ENABLED'] = '1'
+    os.environ.pop('DATABASE_REPLICA_URL', None)
+    os.chdir(os.path.dirname(BENCH_DIR))
+
+    from app import app
+    app.logger.disabled = True
+
+    if needs_seed:
+        started = time.perf_counter()
+        seed(app, args)
+        print(f'База {args.db} заполнена за {time.perf_counter() - started:.1f} с')
+
+    workload = build_workload(app, random.Random(args.seed))
+    report = {
+        'commit': git_commit(),
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'args': vars(args),
+        'test_client': run_test_client(app, workload, args),
+    }
+
+    if not args.skip_http:
+        server = None if args.url else serve_in_background(app)
+        base = urlsplit(args.url or f'http://127.0.0.1:{server.server_port}')
+        report['http'] = run_http(base, workload, args)
+        if server is not None:
+            server.shutdown()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"Сравнение с {baseline['commit']} ({baseline['timestamp']})")
+
+    print_table('Test client, последовательно', report['test_client'], (baseline or {}).get('test_client'))
+    if 'http' in report:
+        print_table(f'HTTP, {args.concurrency} клиентов, {args.duration:g} с', report['http'], (baseline or {}).get('http'))
+
+    os.makedirs(args.output, exist_ok=True)
+    path = os.path.join(args.output, f"{report['commit']}-{datetime.now():%Y%m%d-%H%M%S}.json")
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f'\nРезультаты: {path}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""Image bytes transferred per feed page: original uploads vs thumbnails.
+
+Generates synthetic camera-sized JPEG photos in a temporary folder, runs
+the same variant pipeline as /api/upload and compares the bytes a feed
+page of --page-size cards downloads with main_photo vs thumbnail.
+
+    python bench/feed_bytes.py --page-size 20 --width 4032 --height 3024
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image, ImageFilter
+from images import generate_variants, variant_filename, VARIANTS
+
+
+def make_photo(path, width, height, seed):
+    noise = Image.effect_noise((width // 4, height // 4), 60 + seed % 40)
+    base = Image.merge('RGB', (
+        noise,
+        noise.rotate(90, expand=False),
+        Image.linear_gradient('L').resize(noise.size),
+    )).resize((width, height), Image.BICUBIC).filter(ImageFilter.DETAIL)
+    exif = Image.Exif()
+    exif[0x010F] = 'Benchmark Camera'
+    exif[0x0112] = 1
+    base.save(path, 'JPEG', quality=92, exif=exif)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--page-size', type=int, default=20)
+    parser.add_argument('--width', type=int, default=4032)
+    parser.add_argument('--height', type=int, default=3024)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        filenames = []
+        for i in range(args.page_size):
+            filename = f'photo{i}.jpg'
+            make_photo(os.path.join(folder, filename), args.width, args.height, i)
+            filenames.append(filename)
+
+        started = time.perf_counter()
+        for filename in filenames:
+            generate_variants(folder, filename)
+        elapsed = time.perf_counter() - started
+
+        original = sum(os.path.getsize(os.path.join(folder, f)) for f in filenames)
+        print(f'Страница из {args.page_size} карточек, фото {args.width}x{args.height}')
+        print(f'  main_photo: {original / 1024:.0f} КБ')
+        for variant in VARIANTS:
+            size = sum(os.path.getsize(os.path.join(folder, variant_filename(f, variant))) for f in filenames)
+            print(f'  {variant}: {size / 1024:.0f} КБ ({original / size:.0f}x меньше)')
+        print(f'Обработка: {elapsed / len(filenames) * 1000:.0f} мс на изображение')
+
+
+if __name__ == '__main__':
+    main()
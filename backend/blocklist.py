@@ -0,0 +1,47 @@
+from models import TokenBlocklist, db
+from cache import TTLCache
+from datetime import datetime, timezone
+
+
+class TokenBlocklistCache:
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('JWT_BLOCKLIST_CACHE_SIZE', 10000)
+        app.config.setdefault('JWT_BLOCKLIST_NEGATIVE_TTL', 30)
+        self._entries = TTLCache(
+            app.config['JWT_BLOCKLIST_CACHE_SIZE'],
+            app.config['JWT_BLOCKLIST_NEGATIVE_TTL']
+        )
+        app.extensions['token_blocklist_cache'] = self
+
+    def is_revoked(self, jwt_payload):
+        jti = jwt_payload['jti']
+        revoked = self._entries.get(jti)
+        if revoked is not None:
+            return revoked
+
+        revoked = db.session.execute(
+            db.select(TokenBlocklist.id).where(TokenBlocklist.jti == jti).limit(1)
+        ).first() is not None
+        self._entries.set(jti, revoked, seconds_until(jwt_payload['exp']) if revoked else None)
+        return revoked
+
+    def revoke(self, jwt_payload):
+        db.session.add(TokenBlocklist(jti=jwt_payload['jti']))
+        self._entries.set(jwt_payload['jti'], True, seconds_until(jwt_payload['exp']))
+
+
+def seconds_until(timestamp):
+    return timestamp - datetime.now(timezone.utc).timestamp()
+
+
+def purge_expired_tokens(max_age):
+    cutoff = datetime.now(timezone.utc) - max_age
+    result = db.session.execute(
+        db.delete(TokenBlocklist).where(TokenBlocklist.created_at < cutoff)
+    )
+    db.session.commit()
+    return result.rowcount
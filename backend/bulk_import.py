@@ -0,0 +1,189 @@
+from models import db, User, Ad, AdPhoto
+from datetime import datetime, timezone
+import csv
+import itertools
+import json
+import random
+
+AD_TYPES = ('item', 'service')
+AD_STATUSES = ('active', 'archived')
+SEED_DISTRICTS = ['Центральный', 'Северный', 'Южный', 'Западный', 'Восточный']
+SEED_CATEGORIES = ['electronics', 'furniture', 'clothes', 'kids', 'sport', 'repair', 'cleaning', 'tutoring']
+SEED_WORDS = ['велосипед', 'диван', 'телефон', 'куртка', 'коляска', 'ремонт', 'уборка', 'репетитор',
+              'стол', 'шкаф', 'ноутбук', 'лыжи', 'новый', 'б/у', 'срочно', 'недорого', 'отличный']
+
+
+def read_rows(stream, fmt):
+    if fmt == 'csv':
+        yield from csv.DictReader(stream)
+        return
+    # Decoded in parse_ad_row, so a malformed line only skips that record.
+    for line in stream:
+        line = line.strip()
+        if line:
+            yield line
+
+
+def parse_ad_row(row):
+    if isinstance(row, str):
+        row = json.loads(row)
+    title = (row.get('title') or '').strip()
+    description = (row.get('description') or '').strip()
+    district = (row.get('district') or '').strip()
+    email = (row.get('author_email') or '').strip()
+    if not title or not description or not district or not email:
+        raise ValueError('нужны title, description, district и author_email')
+
+    ad_type = row.get('ad_type') or 'item'
+    if ad_type not in AD_TYPES:
+        raise ValueError(f'неизвестный ad_type {ad_type!r}')
+
+    price = row.get('price')
+    price = float(price) if price not in (None, '') else None
+    if price is not None and price < 0:
+        raise ValueError('цена не может быть меньше 0')
+    views = int(row.get('views') or 0)
+    if views < 0:
+        raise ValueError('views не может быть меньше 0')
+
+    status = row.get('status') or 'active'
+    if status not in AD_STATUSES:
+        raise ValueError(f'неизвестный status {status!r}')
+
+    created_date = row.get('created_date')
+    photos = row.get('photos') or []
+    if isinstance(photos, str):
+        photos = [p for p in photos.split('|') if p]
+
+    name = row.get('author_name') or email.split('@')[0]
+    values = {
+        'title': title,
+        'description': description,
+        'price': price,
+        'price_unit': row.get('price_unit') or 'rub',
+        'ad_type': ad_type,
+        'condition': row.get('condition') or None,
+        'district': district,
+        'address': row.get('address') or None,
+        'views': views,
+        'status': status,
+        'category': row.get('category') or None,
+        'created_date': datetime.fromisoformat(created_date) if created_date else datetime.now(timezone.utc),
+    }
+    # An oversized value would fail the whole batch on PostgreSQL, so it is
+    # rejected here and only this row is skipped.
+    check_length('author_email', email, User.email)
+    check_length('author_name', name, User.name)
+    for field in ('title', 'price_unit', 'condition', 'district', 'address', 'category'):
+        check_length(field, values[field], getattr(Ad, field))
+    for filename in photos:
+        check_length('photos', filename, AdPhoto.image_filename)
+    return email, name, photos, values
+
+
+def check_length(field, value, column):
+    if value is not None and len(value) > column.type.length:
+        raise ValueError(f'{field} длиннее {column.type.length} символов')
+
+
+def ensure_users(authors, user_ids, password_hash):
+    """Fill user_ids (email -> id) for every author, creating missing users."""
+    missing = [email for email in authors if email not in user_ids]
+    if not missing:
+        return 0
+    user_ids.update(db.session.execute(
+        db.select(User.email, User.id).where(User.email.in_(missing))
+    ).all())
+
+    new_users = [email for email in missing if email not in user_ids]
+    if not new_users:
+        return 0
+    if password_hash is None:
+        raise ValueError(f'пользователь {new_users[0]} не найден, а пароль для новых не задан')
+    now = datetime.now(timezone.utc)
+    user_ids.update(db.session.execute(
+        db.insert(User.__table__).returning(User.email, User.id),
+        [{'email': email, 'name': authors[email], 'last_name': '', 'hashed_password': password_hash,
+          'created_date': now, 'is_admin': False} for email in new_users]
+    ).all())
+    return len(new_users)
+
+
+def import_ads(rows, password_hash=None, batch_size=10000, on_error=None):
+    """Insert ads from an iterable of dicts in batches of executemany inserts.
+
+    Each batch is one transaction; authors are looked up by author_email
+    and created with password_hash when missing. Returns a tuple
+    (ads imported, users created, rows skipped).
+    """
+    user_ids = {}
+    imported = created = skipped = 0
+    numbered = enumerate(rows, start=1)
+
+    while True:
+        batch = list(itertools.islice(numbered, batch_size))
+        if not batch:
+            break
+
+        authors, ads, photos = {}, [], []
+        for line, row in batch:
+            try:
+                email, name, ad_photos, values = parse_ad_row(row)
+            except (ValueError, TypeError, AttributeError) as e:
+                skipped += 1
+                if on_error:
+                    on_error(line, e)
+                continue
+            authors.setdefault(email, name)
+            ads.append((email, values))
+            photos.append(ad_photos)
+
+        try:
+            created += ensure_users(authors, user_ids, password_hash)
+            for email, values in ads:
+                values['user_id'] = user_ids[email]
+            ad_rows = [values for _, values in ads]
+            if any(photos):
+                # Ids are only needed to attach photos; ordered RETURNING
+                # costs a statement per row on SQLite, so skip it otherwise.
+                ad_ids = db.session.execute(
+                    db.insert(Ad.__table__).returning(Ad.id, sort_by_parameter_order=True), ad_rows
+                ).scalars().all()
+                db.session.execute(db.insert(AdPhoto.__table__), [
+                    {'ad_id': ad_id, 'image_filename': filename}
+                    for ad_id, filenames in zip(ad_ids, photos) for filename in filenames
+                ])
+            elif ad_rows:
+                db.session.execute(db.insert(Ad.__table__), ad_rows)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        imported += len(ads)
+
+    return imported, created, skipped
+
+
+def synthetic_ads(count, users, email_domain, photos_per_ad=0, seed=None):
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc).timestamp()
+    for number in range(1, count + 1):
+        ad_type = 'service' if rng.random() < 0.3 else 'item'
+        user = rng.randint(1, users)
+        yield {
+            'author_email': f'seed{user}@{email_domain}',
+            'author_name': f'seed{user}',
+            'title': ' '.join(rng.sample(SEED_WORDS, 3)),
+            'description': ' '.join(rng.choices(SEED_WORDS, k=30)),
+            'price': rng.randint(0, 100000),
+            'price_unit': 'rub' if ad_type == 'item' else 'hour',
+            'ad_type': ad_type,
+            'condition': rng.choice(['new', 'used']) if ad_type == 'item' else None,
+            'district': rng.choice(SEED_DISTRICTS),
+            'address': f'ул. Тестовая, {number}',
+            'views': rng.randint(0, 5000),
+            'status': 'active' if rng.random() < 0.95 else 'archived',
+            'category': rng.choice(SEED_CATEGORIES),
+            'created_date': datetime.fromtimestamp(now - rng.randint(0, 365 * 24 * 3600), timezone.utc).isoformat(),
+            'photos': [f'{rng.getrandbits(128):032x}.jpg' for _ in range(photos_per_ad)],
+        }
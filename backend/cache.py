@@ -0,0 +1,57 @@
+from collections import OrderedDict
+import threading
+import time
+
+AD_LIST_CACHE_TTL = 30
+AD_DETAIL_CACHE_TTL = 60
+FACET_CACHE_TTL = 60
+
+
+class TTLCache:
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+ad_list_cache = TTLCache(max_size=2000, ttl=AD_LIST_CACHE_TTL)
+ad_detail_cache = TTLCache(max_size=10000, ttl=AD_DETAIL_CACHE_TTL)
+facet_cache = TTLCache(max_size=1000, ttl=FACET_CACHE_TTL)
+
+
+def invalidate_ad_caches(ad_id=None):
+    ad_list_cache.clear()
+    facet_cache.clear()
+    if ad_id is not None:
+        ad_detail_cache.delete(ad_id)
@@ -0,0 +1,162 @@
+import click
+from flask import current_app
+from models import db, User
+from blocklist import purge_expired_tokens
+from uploads_gc import collect_orphaned_uploads
+from bulk_import import import_ads, read_rows, synthetic_ads
+from werkzeug.security import generate_password_hash
+from images import generate_variants, original_filename, stored_path, upload_folder, variant_filename, VARIANTS
+import os
+import time
+
+
+@click.command('recalculate-ratings')
+def recalculate_ratings_command():
+    User.recalculate_ratings()
+    db.session.commit()
+    click.echo('Рейтинги пользователей пересчитаны')
+
+
+@click.command('purge-token-blocklist')
+def purge_token_blocklist_command():
+    removed = purge_expired_tokens(current_app.config['JWT_REFRESH_TOKEN_EXPIRES'])
+    click.echo(f'Удалено записей из token_blocklist: {removed}')
+
+
+def iter_uploads(folder):
+    for _, _, files in os.walk(folder):
+        for name in files:
+            if not name.endswith('.tmp'):
+                yield name
+
+
+@click.command('generate-thumbnails')
+@click.option('--force', is_flag=True, help='Пересоздать уже существующие варианты')
+def generate_thumbnails_command(force):
+    folder = upload_folder()
+    processed = failed = 0
+    for name in list(iter_uploads(folder)):
+        if original_filename(name):
+            continue
+        if not force and all(
+            os.path.exists(stored_path(folder, variant_filename(name, v))) for v in VARIANTS
+        ):
+            continue
+        try:
+            generate_variants(folder, name)
+            processed += 1
+        except Exception as e:
+            failed += 1
+            click.echo(f'{name}: {e}', err=True)
+    click.echo(f'Обработано изображений: {processed}, ошибок: {failed}')
+
+
+@click.command('reshard-uploads')
+def reshard_uploads_command():
+    folder = upload_folder()
+    moved = 0
+    for entry in os.scandir(folder):
+        if not entry.is_file() or entry.name.endswith('.tmp'):
+            continue
+        target_path = stored_path(folder, entry.name)
+        if target_path == entry.path:
+            continue
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+        os.replace(entry.path, target_path)
+        moved += 1
+    click.echo(f'Перемещено файлов: {moved}')
+
+
+@click.command('gc-uploads')
+@click.option('--grace-hours', default=24, show_default=True, help='Не трогать файлы моложе этого возраста')
+@click.option('--dry-run', is_flag=True, help='Только показать, сколько места освободится')
+def gc_uploads_command(grace_hours, dry_run):
+    scanned, removed, reclaimed = collect_orphaned_uploads(
+        upload_folder(), grace_hours * 3600, dry_run=dry_run
+    )
+    action = 'Будет удалено' if dry_run else 'Удалено'
+    click.echo(f'Просмотрено файлов: {scanned}. {action}: {removed} ({reclaimed / (1024 * 1024):.1f} МБ)')
+
+
+def resolve_password_hash(password, password_hash):
+    if password_hash:
+        return password_hash
+    if password:
+        # Hashing is deliberately slow, so it is done once for all new users.
+        return generate_password_hash(password, method='pbkdf2:sha256')
+    return None
+
+
+def report_import(started, imported, created, skipped):
+    elapsed = time.perf_counter() - started
+    rate = imported / elapsed if elapsed else 0
+    click.echo(
+        f'Импортировано объявлений: {imported}, новых пользователей: {created}, '
+        f'пропущено записей: {skipped} за {elapsed:.1f} с ({rate:.0f} объявлений/с)'
+    )
+
+
+@click.command('import-ads')
+@click.argument('source', type=click.File('r', encoding='utf-8'))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'jsonl']), help='По умолчанию — по расширению файла')
+@click.option('--batch-size', default=10000, show_default=True, help='Строк в одной транзакции')
+@click.option('--password', help='Пароль для создаваемых пользователей')
+@click.option('--password-hash', help='Готовый хэш пароля для создаваемых пользователей')
+def import_ads_command(source, fmt, batch_size, password, password_hash):
+    """Import ads from a CSV or JSONL file ('-' for stdin).
+
+    Columns: title, description, district, author_email and optionally
+    author_name, ad_type, price, price_unit, condition, address, category,
+    status (active or archived), views, created_date and photos
+    ('|'-separated in CSV). Rows with values longer than their columns
+    are skipped.
+    """
+    fmt = fmt or ('csv' if source.name.endswith('.csv') else 'jsonl')
+    errors = []
+
+    def on_error(line, error):
+        errors.append(line)
+        if len(errors) <= 20:
+            click.echo(f'Запись {line}: {error}', err=True)
+
+    started = time.perf_counter()
+    try:
+        imported, created, skipped = import_ads(
+            read_rows(source, fmt),
+            resolve_password_hash(password, password_hash),
+            batch_size=batch_size,
+            on_error=on_error
+        )
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    report_import(started, imported, created, skipped)
+
+
+@click.command('seed')
+@click.option('--users', default=1000, show_default=True)
+@click.option('--ads', default=100000, show_default=True)
+@click.option('--photos', default=0, show_default=True, help='Фото на объявление (только записи в БД)')
+@click.option('--email-domain', default='seed.local', show_default=True)
+@click.option('--batch-size', default=10000, show_default=True, help='Строк в одной транзакции')
+@click.option('--password', default='password', show_default=True, help='Пароль для создаваемых пользователей')
+@click.option('--password-hash', help='Готовый хэш пароля вместо --password')
+@click.option('--random-seed', type=int, help='Для воспроизводимых данных')
+def seed_command(users, ads, photos, email_domain, batch_size, password, password_hash, random_seed):
+    """Fill the database with synthetic users and ads."""
+    started = time.perf_counter()
+    imported, created, skipped = import_ads(
+        synthetic_ads(ads, users, email_domain, photos_per_ad=photos, seed=random_seed),
+        resolve_password_hash(password, password_hash),
+        batch_size=batch_size
+    )
+    report_import(started, imported, created, skipped)
+
+
+def register_commands(app):
+    app.cli.add_command(recalculate_ratings_command)
+    app.cli.add_command(purge_token_blocklist_command)
+    app.cli.add_command(generate_thumbnails_command)
+    app.cli.add_command(reshard_uploads_command)
+    app.cli.add_command(gc_uploads_command)
+    app.cli.add_command(import_ads_command)
+    app.cli.add_command(seed_command)
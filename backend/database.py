@@ -0,0 +1,118 @@
+from flask import g, has_request_context, request
+from flask_sqlalchemy.session import Session
+import os
+import time
+
+
+def env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+def env_flag(name, default):
+    value = os.environ.get(name)
+    if not value:
+        return default
+    return value.lower() in ('1', 'true', 'yes', 'on')
+
+
+def database_uri(default):
+    uri = os.environ.get('DATABASE_URL') or default
+    # Heroku-style URLs use a scheme SQLAlchemy no longer accepts.
+    if uri.startswith('postgres://'):
+        uri = 'postgresql://' + uri[len('postgres://'):]
+    return uri
+
+
+def engine_options(uri):
+    options = {
+        'pool_size': env_int('DB_POOL_SIZE', 10),
+        'max_overflow': env_int('DB_MAX_OVERFLOW', 20),
+        'pool_timeout': env_int('DB_POOL_TIMEOUT', 10),
+        'pool_recycle': env_int('DB_POOL_RECYCLE', 1800),
+        'pool_pre_ping': env_flag('DB_POOL_PRE_PING', not uri.startswith('sqlite')),
+    }
+    if uri.startswith('sqlite'):
+        # sqlite3 turns this into the connection's busy_timeout, so it is
+        # the only place the wait for a locked database is configured.
+        options['connect_args'] = {'timeout': env_int('SQLITE_BUSY_TIMEOUT', 5)}
+    return options
+
+
+REPLICA_BIND = 'replica'
+PRIMARY_COOKIE = 'db_primary_until'
+
+
+def replica_binds(uri):
+    if not uri:
+        return {}
+    return {REPLICA_BIND: {'url': uri, **engine_options(uri)}}
+
+
+def reads_from_replica():
+    return has_request_context() and g.get('db_use_replica', False) and not g.get('db_wrote', False)
+
+
+def mark_write():
+    if has_request_context():
+        g.db_wrote = True
+
+
+class RoutingSession(Session):
+    """Sends reads of replica-enabled GET requests to the replica bind.
+
+    Flushes and UPDATE/INSERT/DELETE statements always go to the primary,
+    and once a request has written, the rest of it reads from the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and not getattr(clause, 'is_dml', False):
+            engines = self._db.engines
+            if REPLICA_BIND in engines and reads_from_replica():
+                return engines[REPLICA_BIND]
+        elif bind is None:
+            mark_write()
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+class ReplicaRouter:
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('DB_REPLICA_BLUEPRINTS', ('api_ads', 'api_reviews', 'admin_api'))
+        app.config.setdefault('DB_PRIMARY_STICKY_SECONDS', 5)
+        self.blueprints = set(app.config['DB_REPLICA_BLUEPRINTS'])
+        self.sticky_seconds = app.config['DB_PRIMARY_STICKY_SECONDS']
+        app.extensions['replica_router'] = self
+        if REPLICA_BIND not in (app.config.get('SQLALCHEMY_BINDS') or {}):
+            return
+        app.before_request(self.choose_bind)
+        app.after_request(self.pin_writer)
+
+    def choose_bind(self):
+        g.db_use_replica = (
+            request.method in ('GET', 'HEAD')
+            and request.blueprint in self.blueprints
+            and not self.pinned_to_primary()
+        )
+
+    def pinned_to_primary(self):
+        try:
+            return float(request.cookies.get(PRIMARY_COOKIE, 0)) > time.time()
+        except ValueError:
+            return False
+
+    def pin_writer(self, response):
+        # Keep this client on the primary for a moment after it writes, so
+        # it reads its own changes even if the replica is lagging.
+        if g.get('db_wrote') and self.sticky_seconds:
+            response.set_cookie(
+                PRIMARY_COOKIE,
+                str(time.time() + self.sticky_seconds),
+                max_age=self.sticky_seconds,
+                httponly=True,
+                samesite='Lax'
+            )
+        return response
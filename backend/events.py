@@ -0,0 +1,98 @@
+from flask import Blueprint, Response, current_app, g, jsonify
+from collections import defaultdict
+import json
+import queue
+import threading
+
+HEARTBEAT_INTERVAL = 15
+SUBSCRIBER_QUEUE_SIZE = 100
+
+api_events_bp = Blueprint('api_events', __name__)
+
+
+class InProcessBroker:
+    """Fan-out of events to the SSE streams opened in this process.
+
+    Another broker (for example one backed by Redis pub/sub) only needs the
+    same subscribe/unsubscribe/publish methods to be dropped in via
+    app.extensions['broker'].
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+
+    def subscribe(self, user_id):
+        subscription = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, user_id, subscription):
+        with self._lock:
+            subscriptions = self._subscribers.get(user_id)
+            if subscriptions is None:
+                return
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscribers[user_id]
+
+    def publish(self, user_id, event):
+        with self._lock:
+            subscriptions = list(self._subscribers.get(user_id, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.put_nowait(event)
+            except queue.Full:
+                pass
+
+    def connection_count(self):
+        with self._lock:
+            return sum(len(s) for s in self._subscribers.values())
+
+
+def get_broker():
+    return current_app.extensions['broker']
+
+
+def publish(user_id, event_type, data):
+    get_broker().publish(user_id, {'type': event_type, 'data': data})
+
+
+def format_event(event):
+    return f"event: {event['type']}\ndata: {json.dumps(event['data'], ensure_ascii=False)}\n\n"
+
+
+@api_events_bp.route('/events', methods=['GET'])
+def stream_events():
+    user_id = g.current_user_id
+    if not user_id:
+        return jsonify({'error': 'Необходима авторизация'}), 401
+
+    broker = get_broker()
+    # Streams share the worker's connection slots with regular requests;
+    # refusing extra streams keeps the rest of the site responsive.
+    if broker.connection_count() >= current_app.config['SSE_MAX_CONNECTIONS']:
+        response = jsonify({'error': 'Слишком много открытых соединений, попробуйте позже'})
+        response.headers['Retry-After'] = str(HEARTBEAT_INTERVAL)
+        return response, 503
+
+    subscription = broker.subscribe(user_id)
+
+    def generate():
+        try:
+            yield ': connected\n\n'
+            while True:
+                try:
+                    event = subscription.get(timeout=HEARTBEAT_INTERVAL)
+                except queue.Empty:
+                    yield ': ping\n\n'
+                    continue
+                yield format_event(event)
+        finally:
+            broker.unsubscribe(user_id, subscription)
+
+    response = Response(generate(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
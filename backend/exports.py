@@ -0,0 +1,71 @@
+from flask import Response, stream_with_context
+from models import db
+from datetime import datetime
+import csv
+import io
+import json
+
+EXPORT_BATCH_SIZE = 1000
+EXPORT_MIMETYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+CSV_FORMULA_PREFIXES = ('=', '+', '-', '@')
+
+
+def export_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def csv_cell(value):
+    value = export_value(value)
+    # Keep spreadsheet apps from evaluating user-supplied text as formulas.
+    if isinstance(value, str) and value.startswith(CSV_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def iter_ndjson(rows, columns):
+    chunk = []
+    for row in rows:
+        record = {column: export_value(value) for column, value in zip(columns, row)}
+        chunk.append(json.dumps(record, ensure_ascii=False))
+        if len(chunk) >= EXPORT_BATCH_SIZE:
+            yield '\n'.join(chunk) + '\n'
+            chunk = []
+    if chunk:
+        yield '\n'.join(chunk) + '\n'
+
+
+def iter_csv(rows, columns):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # BOM so that Excel opens Cyrillic text as UTF-8.
+    buffer.write('\ufeff')
+    writer.writerow(columns)
+    for count, row in enumerate(rows, start=1):
+        writer.writerow([csv_cell(value) for value in row])
+        if count % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def export_response(query, name, fmt):
+    """Stream the rows of query as NDJSON or CSV without loading them all."""
+    columns = [column.key for column in query.selected_columns]
+    serialize = iter_csv if fmt == 'csv' else iter_ndjson
+
+    def generate():
+        rows = db.session.execute(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        yield from serialize(rows, columns)
+
+    response = Response(stream_with_context(generate()), mimetype=EXPORT_MIMETYPES[fmt])
+    filename = f"{name}-{datetime.now():%Y%m%d-%H%M%S}.{fmt}"
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response.headers['Cache-Control'] = 'no-store'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,33 @@
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+
+# The SSE broker, view counter and response caches live in process memory,
+# so one worker is the default; raise WEB_CONCURRENCY only together with a
+# shared broker.
+workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+
+# An open /api/events stream occupies its request handler for as long as
+# the tab stays open. With gthread that is a whole thread, so N open chat
+# tabs starve every other request once N reaches GUNICORN_THREADS. The
+# gevent worker runs each connection in a greenlet instead: streams and
+# regular requests share worker_connections (the SSE capacity of the
+# process), and database access is bounded separately by the SQLAlchemy
+# pool (DB_POOL_SIZE + DB_MAX_OVERFLOW connections, waiting up to
+# DB_POOL_TIMEOUT for a free one). SSE streams do not hold a connection.
+# Thumbnails are generated on native threads (see images.executor_class).
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gevent')
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 1000))
+# Only used with GUNICORN_WORKER_CLASS=gthread, where each open SSE stream
+# takes one of these threads for its whole lifetime.
+threads = int(os.environ.get('GUNICORN_THREADS', 64))
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+graceful_timeout = 30
+keepalive = 5
+
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = max_requests // 10
+
+accesslog = '-'
+errorlog = '-'
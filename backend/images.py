@@ -0,0 +1,173 @@
+from flask import current_app
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image, ImageOps, features
+from werkzeug.security import safe_join
+import hashlib
+import os
+import sys
+import tempfile
+
+VARIANTS = {
+    'thumb': (400, 400),
+    'medium': (1280, 1280),
+}
+VARIANT_FORMAT = 'webp' if features.check('webp') else 'jpeg'
+VARIANT_QUALITY = 80
+UPLOAD_CHUNK_SIZE = 64 * 1024
+IMAGE_SIGNATURES = {
+    b'\x89PNG\r\n\x1a\n': 'png',
+    b'\xff\xd8\xff': 'jpg',
+}
+
+
+def upload_folder(app=None):
+    app = app or current_app
+    return os.path.join(app.root_path, 'static', 'uploads')
+
+
+def shard_path(filename):
+    if len(filename) < 4:
+        return filename
+    return os.path.join(filename[:2], filename[2:4], filename)
+
+
+def stored_path(folder, filename):
+    return os.path.join(folder, shard_path(filename))
+
+
+def variant_filename(filename, variant):
+    if not filename:
+        return None
+    return f"{filename}.{variant}.{VARIANT_FORMAT}"
+
+
+def original_filename(filename):
+    for variant in VARIANTS:
+        suffix = f".{variant}.{VARIANT_FORMAT}"
+        if filename.endswith(suffix):
+            return filename[:-len(suffix)]
+    return None
+
+
+def resolve_upload(folder, filename):
+    """Return (path relative to folder, is_fallback) or (None, False).
+
+    filename comes from the URL, so every candidate goes through safe_join
+    before it touches the filesystem or an X-Accel-Redirect header.
+    """
+    for candidate in (shard_path(filename), filename):
+        path = safe_join(folder, candidate)
+        if path is not None and os.path.isfile(path):
+            return candidate, False
+
+    original = original_filename(filename)
+    if original:
+        for candidate in (shard_path(original), original):
+            path = safe_join(folder, candidate)
+            if path is not None and os.path.isfile(path):
+                return candidate, True
+    return None, False
+
+
+def detect_image_type(header):
+    for signature, ext in IMAGE_SIGNATURES.items():
+        if header.startswith(signature):
+            return ext
+    return None
+
+
+def store_upload(stream, folder):
+    os.makedirs(folder, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=folder, suffix='.tmp')
+    try:
+        digest = hashlib.sha256()
+        with os.fdopen(fd, 'wb') as out:
+            chunk = stream.read(UPLOAD_CHUNK_SIZE)
+            ext = detect_image_type(chunk)
+            if ext is None:
+                return None, False
+            while chunk:
+                digest.update(chunk)
+                out.write(chunk)
+                chunk = stream.read(UPLOAD_CHUNK_SIZE)
+
+        filename = f"{digest.hexdigest()}.{ext}"
+        target_path = stored_path(folder, filename)
+        if os.path.exists(target_path):
+            touch_upload(folder, filename)
+            return filename, False
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+        os.replace(tmp_path, target_path)
+        return filename, True
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def touch_upload(folder, filename):
+    # A deduplicated upload is about to be attached to a new ad; refresh the
+    # mtimes so `flask gc-uploads` treats it as new until then.
+    for name in [filename] + [variant_filename(filename, v) for v in VARIANTS]:
+        try:
+            os.utime(stored_path(folder, name))
+        except FileNotFoundError:
+            pass
+
+
+def generate_variants(folder, filename):
+    source_path, _ = resolve_upload(folder, filename)
+    if source_path is None:
+        raise FileNotFoundError(filename)
+    with Image.open(os.path.join(folder, source_path)) as source:
+        image = ImageOps.exif_transpose(source)
+        has_alpha = 'A' in image.getbands() or 'transparency' in image.info
+        mode = 'RGBA' if has_alpha and VARIANT_FORMAT == 'webp' else 'RGB'
+        if image.mode != mode:
+            image = image.convert(mode)
+
+        for variant, size in VARIANTS.items():
+            resized = image.copy()
+            resized.thumbnail(size, Image.LANCZOS)
+            target_path = stored_path(folder, variant_filename(filename, variant))
+            os.makedirs(os.path.dirname(target_path), exist_ok=True)
+            tmp_path = f"{target_path}.tmp"
+            resized.save(tmp_path, VARIANT_FORMAT, quality=VARIANT_QUALITY, optimize=True)
+            os.replace(tmp_path, target_path)
+
+
+def executor_class():
+    monkey = sys.modules.get('gevent.monkey')
+    if monkey is not None and monkey.is_module_patched('threading'):
+        # Under the gevent worker, ordinary threads are greenlets on the
+        # request loop, and a Pillow resize would stall every request and
+        # SSE stream; gevent's executor runs tasks on native threads.
+        from gevent.threadpool import ThreadPoolExecutor as NativeThreadPoolExecutor
+        return NativeThreadPoolExecutor
+    return ThreadPoolExecutor
+
+
+class ImageProcessor:
+    def __init__(self, app=None):
+        self._executor = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('IMAGE_WORKERS', 2)
+        self.folder = upload_folder(app)
+        self._executor = executor_class()(
+            max_workers=app.config['IMAGE_WORKERS'],
+            thread_name_prefix='image-worker'
+        )
+        app.extensions['image_processor'] = self
+
+    def submit(self, filename):
+        future = self._executor.submit(generate_variants, self.folder, filename)
+        future.add_done_callback(lambda f: report_failure(f, filename))
+        return future
+
+
+def report_failure(future, filename):
+    error = future.exception()
+    if error is not None:
+        print(f"Ошибка обработки изображения {filename}: {error}")
@@ -0,0 +1,143 @@
+from models import Ad, AdPhoto, Review, User, db
+from search import rank_column
+from images import variant_filename
+from datetime import datetime
+import base64
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+SORT_OPTIONS = {
+    'newest': (lambda filters: Ad.created_date, True, datetime.fromisoformat),
+    'price_asc': (lambda filters: db.func.coalesce(Ad.price, 0), False, float),
+    'price_desc': (lambda filters: db.func.coalesce(Ad.price, 0), True, float),
+    'views': (lambda filters: db.func.coalesce(Ad.views, 0), True, int),
+    'relevance': (lambda filters: rank_column(filters['match_query']), False, float),
+}
+
+
+def main_photo_column():
+    return (
+        db.select(AdPhoto.image_filename)
+        .where(AdPhoto.ad_id == Ad.id)
+        .order_by(AdPhoto.id)
+        .limit(1)
+        .correlate(Ad)
+        .scalar_subquery()
+        .label('main_photo')
+    )
+
+
+def listing_select(*extra_columns):
+    return db.select(
+        Ad.id,
+        Ad.title,
+        Ad.price,
+        Ad.price_unit,
+        Ad.district,
+        Ad.created_date,
+        main_photo_column(),
+        *extra_columns
+    )
+
+
+def admin_listing_select(*extra_columns):
+    return (
+        db.select(Ad.id, Ad.title, Ad.price, Ad.created_date, User.email.label('author_email'), *extra_columns)
+        .join(User, User.id == Ad.user_id)
+    )
+
+
+def admin_user_select(grouped_counts=False):
+    # Exports walk every user, so one GROUP BY over ad is cheapest there;
+    # a page of users is better served by an indexed count per row.
+    if grouped_counts:
+        ads_count = (
+            db.select(Ad.user_id, db.func.count(Ad.id).label('ads_count'))
+            .group_by(Ad.user_id)
+            .subquery()
+        )
+        ads_count_column = db.func.coalesce(ads_count.c.ads_count, 0)
+    else:
+        ads_count_column = (
+            db.select(db.func.count(Ad.id))
+            .where(Ad.user_id == User.id)
+            .correlate(User)
+            .scalar_subquery()
+        )
+    query = db.select(
+        User.id, User.name, User.last_name, User.email, User.is_admin, User.created_date,
+        User.rating_count, User.rating_sum, ads_count_column.label('ads_count')
+    )
+    if grouped_counts:
+        query = query.outerjoin(ads_count, ads_count.c.user_id == User.id)
+    return query
+
+
+def admin_review_select():
+    return (
+        db.select(
+            Review.id, Review.rating, Review.text, Review.created_date, Review.author_id,
+            User.name.label('author_name'), Review.target_user_id, Review.ad_id,
+            Ad.title.label('ad_title')
+        )
+        .outerjoin(User, User.id == Review.author_id)
+        .outerjoin(Ad, Ad.id == Review.ad_id)
+    )
+
+
+def serialize_listing(row, is_favorite=False):
+    return {
+        'id': row.id,
+        'title': row.title,
+        'price': row.price,
+        'price_unit': row.price_unit,
+        'district': row.district,
+        'created_date': row.created_date.isoformat() if row.created_date else None,
+        'main_photo': row.main_photo,
+        'thumbnail': variant_filename(row.main_photo, 'thumb'),
+        'is_favorite': is_favorite,
+    }
+
+
+def encode_cursor(key, row_id):
+    raw = f"{key}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, parse_key=datetime.fromisoformat):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        key, row_id = base64.urlsafe_b64decode(padded).decode().split('|')
+        return parse_key(key), int(row_id)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def parse_limit(value):
+    try:
+        limit = int(value) if value is not None else DEFAULT_PAGE_SIZE
+    except ValueError:
+        return None
+    if limit < 1:
+        return None
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def cursor_key(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return repr(value)
+
+
+def paginate(query, sort_column, descending, cursor, limit):
+    if cursor:
+        last_key, ad_id = cursor
+        after_key = sort_column < last_key if descending else sort_column > last_key
+        query = query.where(db.or_(
+            after_key,
+            db.and_(sort_column == last_key, Ad.id < ad_id)
+        ))
+    order = sort_column.desc() if descending else sort_column.asc()
+    return query.order_by(order, Ad.id.desc()).limit(limit + 1)
+
@@ -1,6 +1,8 @@
 from flask import Blueprint, jsonify, request, g
 from models import Message, Ad, User, db
-from sqlalchemy import or_, and_, desc
+from sqlalchemy import or_, and_, desc, case, func, select
+from events import publish
+from listings import main_photo_column, encode_cursor, decode_cursor, parse_limit
 
 api_messages_bp = Blueprint('api_messages', __name__)
 
@@ -42,6 +44,18 @@ def send_message():
         )
         db.session.add(new_msg)
         db.session.commit()
+
+        for viewer_id, partner_id in ((recipient_id, user_id), (user_id, recipient_id)):
+            publish(viewer_id, 'message', {
+                'id': new_msg.id,
+                'ad_id': new_msg.ad_id,
+                'partner_id': partner_id,
+                'body': new_msg.body,
+                'sender_id': new_msg.sender_id,
+                'recipient_id': new_msg.recipient_id,
+                'created_date': new_msg.created_date.isoformat(),
+                'is_mine': viewer_id == user_id
+            })
         
         return jsonify({
             'message': 'Сообщение отправлено',
@@ -62,48 +76,109 @@ def get_my_chats():
     if not user_id:
         return jsonify({'error': 'Необходима авторизация'}), 401
 
-    messages = Message.query.filter(
+    limit = parse_limit(request.args.get('limit'))
+    if limit is None:
+        return jsonify({'error': 'Некорректный limit'}), 400
+
+    cursor = None
+    if request.args.get('cursor'):
+        cursor = decode_cursor(request.args['cursor'])
+        if cursor is None:
+            return jsonify({'error': 'Некорректный cursor'}), 400
+
+    partner_id = case((Message.sender_id == user_id, Message.recipient_id), else_=Message.sender_id)
+    latest = select(
+        Message.id,
+        Message.ad_id,
+        partner_id.label('partner_id'),
+        Message.body,
+        Message.created_date,
+        func.row_number().over(
+            partition_by=(Message.ad_id, partner_id),
+            order_by=(Message.created_date.desc(), Message.id.desc())
+        ).label('rn')
+    ).where(
         or_(Message.sender_id == user_id, Message.recipient_id == user_id)
-    ).order_by(Message.created_date.desc()).all()
+    ).subquery()
+
+    query = (
+        select(
+            latest.c.id,
+            latest.c.created_date,
+            latest.c.body,
+            Ad.id.label('ad_id'),
+            Ad.title,
+            Ad.user_id,
+            main_photo_column(),
+            User.id.label('partner_id'),
+            User.name,
+            User.last_name
+        )
+        .join(Ad, Ad.id == latest.c.ad_id)
+        .join(User, User.id == latest.c.partner_id)
+        .where(latest.c.rn == 1)
+    )
+    if cursor:
+        created_date, message_id = cursor
+        query = query.where(or_(
+            latest.c.created_date < created_date,
+            and_(latest.c.created_date == created_date, latest.c.id < message_id)
+        ))
+    query = query.order_by(latest.c.created_date.desc(), latest.c.id.desc()).limit(limit + 1)
+
+    rows = db.session.execute(query).all()
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor(last.created_date.isoformat(), last.id)
+
+    chats = []
+    for row in rows[:limit]:
+        chats.append({
+            'ad_id': row.ad_id,
+            'ad_title': row.title,
+            'ad_photo': row.main_photo,
+            'partner_id': row.partner_id,
+            'partner_name': f"{row.name} {row.last_name}",
+            'last_message': row.body,
+            'last_message_date': row.created_date.isoformat(),
+            'is_my_ad': row.user_id == user_id
+        })
 
-    chats = {}
-    
-    for msg in messages:
-        partner_id = msg.recipient_id if msg.sender_id == user_id else msg.sender_id
-        
-        chat_key = f"{msg.ad_id}_{partner_id}"
-        if chat_key not in chats:
-            partner = User.query.get(partner_id)
-            ad = Ad.query.get(msg.ad_id)
-            
-            if partner and ad:
-                chats[chat_key] = {
-                    'ad_id': ad.id,
-                    'ad_title': ad.title,
-                    'ad_photo': ad.photos[0].image_filename if ad.photos else None,
-                    'partner_id': partner.id,
-                    'partner_name': f"{partner.name} {partner.last_name}",
-                    'last_message': msg.body,
-                    'last_message_date': msg.created_date.isoformat(),
-                    'is_my_ad': ad.user_id == user_id 
-                }
-
-    return jsonify(list(chats.values()))
+    return jsonify({'items': chats, 'next_cursor': next_cursor})
 
 @api_messages_bp.route('/chats/<int:ad_id>/<int:partner_id>', methods=['GET'])
 def get_conversation(ad_id, partner_id):
     user_id = g.current_user_id
     if not user_id:
         return jsonify({'error': 'Необходима авторизация'}), 401
-    messages = Message.query.filter(
-        and_(
-            Message.ad_id == ad_id,
-            or_(
-                and_(Message.sender_id == user_id, Message.recipient_id == partner_id),
-                and_(Message.sender_id == partner_id, Message.recipient_id == user_id)
-            )
+    limit = parse_limit(request.args.get('limit'))
+    if limit is None:
+        return jsonify({'error': 'Некорректный limit'}), 400
+
+    try:
+        before_id = int(request.args['before_id']) if 'before_id' in request.args else None
+        after_id = int(request.args['after_id']) if 'after_id' in request.args else None
+    except ValueError:
+        return jsonify({'error': 'Некорректный before_id или after_id'}), 400
+
+    query = Message.query.filter(
+        or_(
+            and_(Message.ad_id == ad_id, Message.sender_id == user_id, Message.recipient_id == partner_id),
+            and_(Message.ad_id == ad_id, Message.sender_id == partner_id, Message.recipient_id == user_id)
         )
-    ).order_by(Message.created_date.asc()).all() 
+    )
+    if before_id is not None:
+        query = query.filter(Message.id < before_id)
+
+    if after_id is not None:
+        messages = query.filter(Message.id > after_id).order_by(Message.id.asc()).limit(limit + 1).all()
+        has_more = len(messages) > limit
+        messages = messages[:limit]
+    else:
+        messages = query.order_by(Message.id.desc()).limit(limit + 1).all()
+        has_more = len(messages) > limit
+        messages = list(reversed(messages[:limit]))
 
     result = []
     for msg in messages:
@@ -116,7 +191,7 @@ def get_conversation(ad_id, partner_id):
             'is_mine': msg.sender_id == user_id 
         })
 
-    return jsonify(result)
+    return jsonify({'items': result, 'has_more': has_more})
 
 @api_messages_bp.route('/messages/<int:message_id>', methods=['DELETE'])
 def delete_message(message_id):
@@ -0,0 +1,58 @@
+"""add indexes for feed, chat and review filters
+
+Revision ID: 2d7b9c3e5f12
+Revises: 8c1f4e2a9b01
+Create Date: 2026-10-18 12:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2d7b9c3e5f12'
+down_revision = '8c1f4e2a9b01'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('ad', schema=None) as batch_op:
+        batch_op.create_index('ix_ad_status_created_date_id', ['status', 'created_date', 'id'], unique=False)
+        batch_op.create_index('ix_ad_status_ad_type_created_date_id', ['status', 'ad_type', 'created_date', 'id'], unique=False)
+        batch_op.create_index('ix_ad_status_category', ['status', 'category'], unique=False)
+        batch_op.create_index('ix_ad_status_district', ['status', 'district'], unique=False)
+        batch_op.create_index('ix_ad_user_id', ['user_id'], unique=False)
+
+    with op.batch_alter_table('ad_photo', schema=None) as batch_op:
+        batch_op.create_index('ix_ad_photo_ad_id_id', ['ad_id', 'id'], unique=False)
+
+    with op.batch_alter_table('message', schema=None) as batch_op:
+        batch_op.create_index('ix_message_sender_id_created_date', ['sender_id', 'created_date'], unique=False)
+        batch_op.create_index('ix_message_recipient_id_created_date', ['recipient_id', 'created_date'], unique=False)
+        batch_op.create_index('ix_message_ad_id_sender_id_recipient_id', ['ad_id', 'sender_id', 'recipient_id'], unique=False)
+
+    with op.batch_alter_table('review', schema=None) as batch_op:
+        batch_op.create_index('ix_review_target_user_id_created_date', ['target_user_id', 'created_date'], unique=False)
+        batch_op.create_index('ix_review_author_id_ad_id', ['author_id', 'ad_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('review', schema=None) as batch_op:
+        batch_op.drop_index('ix_review_author_id_ad_id')
+        batch_op.drop_index('ix_review_target_user_id_created_date')
+
+    with op.batch_alter_table('message', schema=None) as batch_op:
+        batch_op.drop_index('ix_message_ad_id_sender_id_recipient_id')
+        batch_op.drop_index('ix_message_recipient_id_created_date')
+        batch_op.drop_index('ix_message_sender_id_created_date')
+
+    with op.batch_alter_table('ad_photo', schema=None) as batch_op:
+        batch_op.drop_index('ix_ad_photo_ad_id_id')
+
+    with op.batch_alter_table('ad', schema=None) as batch_op:
+        batch_op.drop_index('ix_ad_user_id')
+        batch_op.drop_index('ix_ad_status_district')
+        batch_op.drop_index('ix_ad_status_category')
+        batch_op.drop_index('ix_ad_status_ad_type_created_date_id')
+        batch_op.drop_index('ix_ad_status_created_date_id')
@@ -0,0 +1,34 @@
+"""add rating_sum and rating_count to user
+
+Revision ID: 5a8e1d4c7b23
+Revises: 2d7b9c3e5f12
+Create Date: 2026-10-18 12:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5a8e1d4c7b23'
+down_revision = '2d7b9c3e5f12'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('rating_sum', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('rating_count', sa.Integer(), server_default='0', nullable=False))
+
+    op.execute(
+        'UPDATE "user" SET '
+        'rating_sum = (SELECT COALESCE(SUM(rating), 0) FROM review WHERE review.target_user_id = "user".id), '
+        'rating_count = (SELECT COUNT(id) FROM review WHERE review.target_user_id = "user".id)'
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('rating_count')
+        batch_op.drop_column('rating_sum')
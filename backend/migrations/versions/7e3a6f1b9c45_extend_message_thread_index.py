@@ -0,0 +1,28 @@
+"""add id to the message thread index
+
+Revision ID: 7e3a6f1b9c45
+Revises: 5a8e1d4c7b23
+Create Date: 2026-10-18 12:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7e3a6f1b9c45'
+down_revision = '5a8e1d4c7b23'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('message', schema=None) as batch_op:
+        batch_op.drop_index('ix_message_ad_id_sender_id_recipient_id')
+        batch_op.create_index('ix_message_ad_id_sender_id_recipient_id_id', ['ad_id', 'sender_id', 'recipient_id', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('message', schema=None) as batch_op:
+        batch_op.drop_index('ix_message_ad_id_sender_id_recipient_id_id')
+        batch_op.create_index('ix_message_ad_id_sender_id_recipient_id', ['ad_id', 'sender_id', 'recipient_id'], unique=False)
@@ -0,0 +1,122 @@
+"""initial schema
+
+Revision ID: 8c1f4e2a9b01
+Revises: 
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c1f4e2a9b01'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Databases created earlier with db.create_all() already have these
+    # tables, so only the missing ones are created.
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if 'token_blocklist' not in existing:
+        op.create_table('token_blocklist',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('jti', sa.String(length=36), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_token_blocklist_jti', 'token_blocklist', ['jti'], unique=False)
+
+    if 'user' not in existing:
+        op.create_table('user',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('last_name', sa.String(length=100), nullable=False),
+        sa.Column('email', sa.String(length=100), nullable=False),
+        sa.Column('hashed_password', sa.String(length=255), nullable=False),
+        sa.Column('created_date', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('is_admin', sa.Boolean(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('email')
+        )
+
+    if 'ad' not in existing:
+        op.create_table('ad',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String(length=200), nullable=False),
+        sa.Column('description', sa.Text(), nullable=False),
+        sa.Column('price', sa.Float(), nullable=True),
+        sa.Column('price_unit', sa.String(length=20), nullable=True),
+        sa.Column('ad_type', sa.String(length=20), nullable=False),
+        sa.Column('condition', sa.String(length=20), nullable=True),
+        sa.Column('district', sa.String(length=50), nullable=False),
+        sa.Column('address', sa.String(length=100), nullable=True),
+        sa.Column('views', sa.Integer(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=True),
+        sa.Column('category', sa.String(length=100), nullable=True),
+        sa.Column('created_date', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+
+    if 'favorites' not in existing:
+        op.create_table('favorites',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('ad_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['ad_id'], ['ad.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('user_id', 'ad_id')
+        )
+
+    if 'ad_photo' not in existing:
+        op.create_table('ad_photo',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('image_filename', sa.String(length=255), nullable=False),
+        sa.Column('ad_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['ad_id'], ['ad.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+
+    if 'message' not in existing:
+        op.create_table('message',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('body', sa.Text(), nullable=False),
+        sa.Column('created_date', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('sender_id', sa.Integer(), nullable=False),
+        sa.Column('recipient_id', sa.Integer(), nullable=False),
+        sa.Column('ad_id', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['ad_id'], ['ad.id'], ),
+        sa.ForeignKeyConstraint(['recipient_id'], ['user.id'], ),
+        sa.ForeignKeyConstraint(['sender_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+
+    if 'review' not in existing:
+        op.create_table('review',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('rating', sa.Integer(), nullable=False),
+        sa.Column('text', sa.Text(), nullable=True),
+        sa.Column('created_date', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('author_id', sa.Integer(), nullable=False),
+        sa.Column('target_user_id', sa.Integer(), nullable=False),
+        sa.Column('ad_id', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['ad_id'], ['ad.id'], ),
+        sa.ForeignKeyConstraint(['author_id'], ['user.id'], ),
+        sa.ForeignKeyConstraint(['target_user_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+
+
+def downgrade():
+    op.drop_table('review')
+    op.drop_table('message')
+    op.drop_table('ad_photo')
+    op.drop_table('favorites')
+    op.drop_table('ad')
+    op.drop_table('user')
+    op.drop_index('ix_token_blocklist_jti', table_name='token_blocklist')
+    op.drop_table('token_blocklist')
@@ -0,0 +1,65 @@
+"""add FTS5 index over ad title and description
+
+Revision ID: b4f2c8d1e367
+Revises: 7e3a6f1b9c45
+Create Date: 2026-10-18 12:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b4f2c8d1e367'
+down_revision = '7e3a6f1b9c45'
+branch_labels = None
+depends_on = None
+
+
+AD_FTS_VECTOR_INDEX = (
+    "CREATE INDEX ad_fts_vector ON ad USING gin (("
+    "setweight(to_tsvector('simple', title), 'A') || "
+    "setweight(to_tsvector('simple', description), 'B')))"
+)
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        # PostgreSQL has no FTS5; an expression GIN index matching
+        # search.ad_search_vector() serves the same queries.
+        op.execute(AD_FTS_VECTOR_INDEX)
+        return
+
+    op.execute(
+        "CREATE VIRTUAL TABLE ad_fts USING fts5("
+        "title, description, content='ad', content_rowid='id', "
+        "tokenize='unicode61 remove_diacritics 2')"
+    )
+    op.execute(
+        "CREATE TRIGGER ad_fts_after_insert AFTER INSERT ON ad BEGIN "
+        "INSERT INTO ad_fts(rowid, title, description) VALUES (new.id, new.title, new.description); "
+        "END"
+    )
+    op.execute(
+        "CREATE TRIGGER ad_fts_after_delete AFTER DELETE ON ad BEGIN "
+        "INSERT INTO ad_fts(ad_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description); "
+        "END"
+    )
+    op.execute(
+        "CREATE TRIGGER ad_fts_after_update AFTER UPDATE OF title, description ON ad BEGIN "
+        "INSERT INTO ad_fts(ad_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description); "
+        "INSERT INTO ad_fts(rowid, title, description) VALUES (new.id, new.title, new.description); "
+        "END"
+    )
+    op.execute("INSERT INTO ad_fts(ad_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("DROP INDEX ad_fts_vector")
+        return
+
+    op.execute("DROP TRIGGER ad_fts_after_update")
+    op.execute("DROP TRIGGER ad_fts_after_delete")
+    op.execute("DROP TRIGGER ad_fts_after_insert")
+    op.execute("DROP TABLE ad_fts")
@@ -0,0 +1,34 @@
+"""set review.ad_id to NULL when the ad is deleted
+
+Revision ID: c7d2e9f4a158
+Revises: b4f2c8d1e367
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7d2e9f4a158'
+down_revision = 'b4f2c8d1e367'
+branch_labels = None
+depends_on = None
+
+# The initial schema left foreign keys unnamed; PostgreSQL calls this one
+# review_ad_id_fkey, and SQLite needs a naming convention to find it.
+NAMING_CONVENTION = {'fk': '%(table_name)s_%(column_0_name)s_fkey'}
+
+
+def replace_ad_foreign_key(ondelete):
+    with op.batch_alter_table('review', schema=None, naming_convention=NAMING_CONVENTION) as batch_op:
+        batch_op.drop_constraint('review_ad_id_fkey', type_='foreignkey')
+        batch_op.create_foreign_key('review_ad_id_fkey', 'ad', ['ad_id'], ['id'], ondelete=ondelete)
+
+
+def upgrade():
+    replace_ad_foreign_key('SET NULL')
+
+
+def downgrade():
+    replace_ad_foreign_key(None)
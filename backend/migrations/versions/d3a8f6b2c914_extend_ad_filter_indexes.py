@@ -0,0 +1,32 @@
+"""add the feed sort key to the category and district indexes
+
+Revision ID: d3a8f6b2c914
+Revises: c7d2e9f4a158
+Create Date: 2026-10-18 18:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd3a8f6b2c914'
+down_revision = 'c7d2e9f4a158'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('ad', schema=None) as batch_op:
+        batch_op.drop_index('ix_ad_status_category')
+        batch_op.drop_index('ix_ad_status_district')
+        batch_op.create_index('ix_ad_status_category_created_date_id', ['status', 'category', 'created_date', 'id'], unique=False)
+        batch_op.create_index('ix_ad_status_district_created_date_id', ['status', 'district', 'created_date', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('ad', schema=None) as batch_op:
+        batch_op.drop_index('ix_ad_status_district_created_date_id')
+        batch_op.drop_index('ix_ad_status_category_created_date_id')
+        batch_op.create_index('ix_ad_status_district', ['status', 'district'], unique=False)
+        batch_op.create_index('ix_ad_status_category', ['status', 'category'], unique=False)
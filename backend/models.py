@@ -1,8 +1,22 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime, timezone
 from flask_login import UserMixin
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from database import RoutingSession
+import sqlite3
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+
+@event.listens_for(Engine, 'connect')
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.close()
 
 class TokenBlocklist(db.Model):
     __tablename__ = 'token_blocklist'
@@ -33,14 +47,36 @@ class User(UserMixin, db.Model):
     reviews_received = db.relationship('Review', foreign_keys='Review.target_user_id', backref='target_user', lazy='dynamic', cascade='all, delete-orphan')
     saved_ads = db.relationship('Ad', secondary=favorites, backref=db.backref('favorited_by', lazy='dynamic'), lazy='dynamic')
     is_admin = db.Column(db.Boolean, default=False)
+    rating_sum = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
 
     @property
     def average_rating(self):
-        reviews = self.reviews_received.all()
-        if not reviews:
+        if not self.rating_count:
             return 0
-        total = sum([r.rating for r in reviews])
-        return round(total / len(reviews), 1)
+        return round(self.rating_sum / self.rating_count, 1)
+
+    @staticmethod
+    def adjust_rating(user_id, rating, count):
+        db.session.execute(
+            db.update(User)
+            .where(User.id == user_id)
+            .values(
+                rating_sum=User.rating_sum + rating * count,
+                rating_count=User.rating_count + count
+            )
+        )
+
+    @staticmethod
+    def recalculate_ratings():
+        db.session.execute(
+            db.update(User).values(
+                rating_sum=db.select(db.func.coalesce(db.func.sum(Review.rating), 0))
+                    .where(Review.target_user_id == User.id).scalar_subquery(),
+                rating_count=db.select(db.func.count(Review.id))
+                    .where(Review.target_user_id == User.id).scalar_subquery()
+            )
+        )
 
     def __repr__(self):
         return f'<User {self.name}>'
@@ -54,7 +90,23 @@ class User(UserMixin, db.Model):
             self.saved_ads.remove(ad)
 
     def has_liked(self, ad):
-        return self.saved_ads.filter(favorites.c.ad_id == ad.id).count() > 0
+        return ad.id in self.liked_ad_ids([ad.id])
+
+    def liked_ad_ids(self, ad_ids):
+        return User.favorite_ad_ids(self.id, ad_ids)
+
+    @staticmethod
+    def favorite_ad_ids(user_id, ad_ids):
+        ad_ids = list(ad_ids)
+        if not ad_ids:
+            return set()
+        rows = db.session.execute(
+            db.select(favorites.c.ad_id).where(
+                favorites.c.user_id == user_id,
+                favorites.c.ad_id.in_(ad_ids)
+            )
+        )
+        return {row.ad_id for row in rows}
 
 class Ad(db.Model):
     __tablename__ = 'ad'
@@ -75,6 +127,14 @@ class Ad(db.Model):
     photos = db.relationship('AdPhoto', backref='ad', lazy=True, cascade='all, delete-orphan')
     messages = db.relationship('Message', backref='ad', lazy=True)
 
+    __table_args__ = (
+        db.Index('ix_ad_status_created_date_id', 'status', 'created_date', 'id'),
+        db.Index('ix_ad_status_ad_type_created_date_id', 'status', 'ad_type', 'created_date', 'id'),
+        db.Index('ix_ad_status_category_created_date_id', 'status', 'category', 'created_date', 'id'),
+        db.Index('ix_ad_status_district_created_date_id', 'status', 'district', 'created_date', 'id'),
+        db.Index('ix_ad_user_id', 'user_id'),
+    )
+
     def __repr__(self):
         return f'<Ad {self.title} ({self.ad_type})>'
 
@@ -84,6 +144,10 @@ class AdPhoto(db.Model):
     image_filename = db.Column(db.String(255), nullable=False) 
     ad_id = db.Column(db.Integer, db.ForeignKey('ad.id'), nullable=False)
 
+    __table_args__ = (
+        db.Index('ix_ad_photo_ad_id_id', 'ad_id', 'id'),
+    )
+
     def __repr__(self):
         return f'<Photo {self.image_filename}>'
 
@@ -95,6 +159,13 @@ class Message(db.Model):
     sender_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     recipient_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     ad_id = db.Column(db.Integer, db.ForeignKey('ad.id'), nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_message_sender_id_created_date', 'sender_id', 'created_date'),
+        db.Index('ix_message_recipient_id_created_date', 'recipient_id', 'created_date'),
+        db.Index('ix_message_ad_id_sender_id_recipient_id_id', 'ad_id', 'sender_id', 'recipient_id', 'id'),
+    )
+
     def __repr__(self):
         return f'<Message {self.id} from {self.sender_id} to {self.recipient_id}>'
     
@@ -106,7 +177,12 @@ class Review(db.Model):
     created_date = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
     author_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     target_user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    ad_id = db.Column(db.Integer, db.ForeignKey('ad.id'), nullable=True)
+    ad_id = db.Column(db.Integer, db.ForeignKey('ad.id', ondelete='SET NULL'), nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_review_target_user_id_created_date', 'target_user_id', 'created_date'),
+        db.Index('ix_review_author_id_ad_id', 'author_id', 'ad_id'),
+    )
 
     def __repr__(self):
         return f'<Review {self.rating} stars for user {self.target_user_id}>'
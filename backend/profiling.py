@@ -0,0 +1,137 @@
+from flask import Response, current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from collections import defaultdict
+import bisect
+import threading
+import time
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+HISTOGRAMS = (
+    ('http_request_duration_seconds', 'duration'),
+    ('http_request_sql_duration_seconds', 'sql_duration'),
+    ('http_request_sql_queries', 'sql_queries'),
+)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def render(self, name, labels):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_sum{{{labels}}} {self.total}')
+        lines.append(f'{name}_count{{{labels}}} {self.count}')
+        return lines
+
+
+class EndpointStats:
+    def __init__(self):
+        self.duration = Histogram(DURATION_BUCKETS)
+        self.sql_duration = Histogram(DURATION_BUCKETS)
+        self.sql_queries = Histogram(QUERY_COUNT_BUCKETS)
+        self.slow_requests = 0
+
+
+class RequestProfiler:
+    """Per-request wall time and SQL statistics, exposed on /metrics.
+
+    Disabled unless PROFILING_ENABLED is set, since every statement goes
+    through the engine event hooks below.
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self._stats = defaultdict(EndpointStats)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('PROFILING_ENABLED', False)
+        app.config.setdefault('PROFILING_QUERY_THRESHOLD', 20)
+        app.extensions['request_profiler'] = self
+        if not app.config['PROFILING_ENABLED']:
+            return
+        self.query_threshold = app.config['PROFILING_QUERY_THRESHOLD']
+        event.listen(Engine, 'before_cursor_execute', before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', after_cursor_execute)
+        app.before_request(self.start_request)
+        app.after_request(self.finish_request)
+        app.add_url_rule('/metrics', 'metrics', self.metrics)
+
+    def start_request(self):
+        g.profile_started = time.perf_counter()
+        g.sql_queries = 0
+        g.sql_duration = 0.0
+
+    def finish_request(self, response):
+        started = g.get('profile_started')
+        if started is None or request.endpoint == 'metrics':
+            return response
+
+        duration = time.perf_counter() - started
+        endpoint = request.endpoint or 'unmatched'
+        slow = g.sql_queries > self.query_threshold
+        with self._lock:
+            stats = self._stats[(endpoint, request.method)]
+            stats.duration.observe(duration)
+            stats.sql_duration.observe(g.sql_duration)
+            stats.sql_queries.observe(g.sql_queries)
+            stats.slow_requests += slow
+
+        if slow:
+            current_app.logger.warning(
+                '%s %s: %d SQL-запросов за %.1f мс (порог %d)',
+                request.method, request.path, g.sql_queries, g.sql_duration * 1000, self.query_threshold
+            )
+        response.headers['X-Query-Count'] = str(g.sql_queries)
+        response.headers['Server-Timing'] = (
+            f'app;dur={duration * 1000:.1f}, db;dur={g.sql_duration * 1000:.1f}'
+        )
+        return response
+
+    def metrics(self):
+        lines = []
+        with self._lock:
+            stats = sorted(self._stats.items())
+            for name, attr in HISTOGRAMS:
+                lines.append(f'# TYPE {name} histogram')
+                for (endpoint, method), endpoint_stats in stats:
+                    lines += getattr(endpoint_stats, attr).render(name, endpoint_labels(endpoint, method))
+            lines.append('# TYPE http_requests_over_query_threshold_total counter')
+            for (endpoint, method), endpoint_stats in stats:
+                labels = endpoint_labels(endpoint, method)
+                lines.append(f'http_requests_over_query_threshold_total{{{labels}}} {endpoint_stats.slow_requests}')
+
+        broker = current_app.extensions.get('broker')
+        if broker is not None:
+            lines.append('# TYPE sse_connections gauge')
+            lines.append(f'sse_connections {broker.connection_count()}')
+        return Response('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
+
+
+def endpoint_labels(endpoint, method):
+    return f'endpoint="{endpoint}",method="{method}"'
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context.profile_started = time.perf_counter()
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'sql_queries' in g:
+        g.sql_queries += 1
+        g.sql_duration += time.perf_counter() - context.profile_started
@@ -38,6 +38,7 @@ def create_review():
             ad_id=ad.id
         )
         db.session.add(new_review)
+        User.adjust_rating(ad.user_id, new_review.rating, 1)
         db.session.commit()
         return jsonify({'message': 'Отзыв опубликован'}), 201
     except Exception as e:
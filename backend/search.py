@@ -0,0 +1,56 @@
+from models import Ad, db
+import re
+
+TITLE_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+TS_CONFIG = 'simple'
+
+ad_fts = db.table('ad_fts', db.column('rowid'), db.column('ad_fts'), db.column('title'), db.column('description'))
+
+
+def is_postgresql():
+    return db.engine.dialect.name == 'postgresql'
+
+
+def ts_config():
+    return db.literal_column(f"'{TS_CONFIG}'::regconfig")
+
+
+def ad_search_vector():
+    # Must stay identical to the expression of the ad_fts_vector index,
+    # otherwise PostgreSQL will not use it.
+    return db.func.setweight(db.func.to_tsvector(ts_config(), Ad.title), db.literal_column("'A'")).op('||')(
+        db.func.setweight(db.func.to_tsvector(ts_config(), Ad.description), db.literal_column("'B'"))
+    )
+
+
+def build_match_query(q):
+    terms = re.findall(r'\w+', q or '')
+    if not terms:
+        return None
+    if is_postgresql():
+        return ' & '.join(f'{term}:*' for term in terms)
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def rank_column(match_query):
+    if is_postgresql():
+        weights = db.literal_column(f"'{{0, 0, {DESCRIPTION_WEIGHT / TITLE_WEIGHT}, 1}}'::real[]")
+        rank = db.func.ts_rank(weights, ad_search_vector(), db.func.to_tsquery(ts_config(), match_query))
+        # Negated so that, like bm25, a smaller value means a better match.
+        return -db.cast(rank, db.Double)
+    return db.func.bm25(ad_fts.c.ad_fts, TITLE_WEIGHT, DESCRIPTION_WEIGHT)
+
+
+def search_ads(query, match_query):
+    if is_postgresql():
+        return query.where(ad_search_vector().op('@@')(db.func.to_tsquery(ts_config(), match_query)))
+    return (
+        query
+        .join(ad_fts, ad_fts.c.rowid == Ad.id)
+        .where(ad_fts.c.ad_fts.op('MATCH')(match_query))
+    )
+
+
+def include_in_migrations(name, type_, parent_names):
+    return not (type_ in ('table', 'index') and name and name.startswith('ad_fts'))
@@ -0,0 +1,70 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# app.py reads these at import time.
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(prefix='webproject-tests-'), 'test.db')
+os.environ['PROFILING_ENABLED'] = '1'
+
+SEED_USERS = 5
+SEED_ADS = 60
+SEED_PHOTOS_PER_AD = 3
+EMAIL_DOMAIN = 'tests.local'
+
+
+@pytest.fixture(scope='session')
+def app():
+    from app import app
+    from flask_migrate import upgrade
+    from models import db, User
+    from bulk_import import import_ads, synthetic_ads
+
+    with app.app_context():
+        upgrade(directory=os.path.join(BACKEND_DIR, 'migrations'))
+        import_ads(
+            synthetic_ads(SEED_ADS, SEED_USERS, EMAIL_DOMAIN, photos_per_ad=SEED_PHOTOS_PER_AD, seed=1),
+            password_hash='unused'
+        )
+        db.session.execute(db.update(User).where(User.email == f'seed1@{EMAIL_DOMAIN}').values(is_admin=True))
+        db.session.commit()
+    return app
+
+
+def login(app, email):
+    from flask_jwt_extended import create_access_token
+    from models import db, User
+
+    with app.app_context():
+        user_id = db.session.execute(db.select(User.id).where(User.email == email)).scalar_one()
+        token = create_access_token(identity=str(user_id))
+    client = app.test_client()
+    client.set_cookie('access_token_cookie', token)
+    return client, user_id
+
+
+@pytest.fixture
+def admin_client(app):
+    client, _ = login(app, f'seed1@{EMAIL_DOMAIN}')
+    return client
+
+
+@pytest.fixture(scope='session', autouse=True)
+def sqlite_foreign_keys():
+    # The app leaves SQLite's foreign key checks off; the tests turn them
+    # on so constraint violations surface here as they would on PostgreSQL.
+    import sqlite3
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    def enable(dbapi_connection, connection_record):
+        if isinstance(dbapi_connection, sqlite3.Connection):
+            dbapi_connection.execute('PRAGMA foreign_keys=ON')
+
+    event.listen(Engine, 'connect', enable)
+    yield
+    event.remove(Engine, 'connect', enable)
@@ -0,0 +1,37 @@
+import pytest
+
+from conftest import EMAIL_DOMAIN, login
+
+
+def create_ad_with_history(app, client):
+    from models import db, Review, Message, User, favorites
+
+    response = client.post('/api/ads', json={
+        'title': 'Велосипед', 'description': 'Горный', 'district': 'Центральный', 'address': 'ул. 1'
+    })
+    assert response.status_code == 201
+    ad_id = response.get_json()['id']
+    with app.app_context():
+        owner_id, other_id = db.session.execute(
+            db.select(User.id).where(User.email.in_([f'seed1@{EMAIL_DOMAIN}', f'seed2@{EMAIL_DOMAIN}']))
+            .order_by(User.email)
+        ).scalars().all()
+        review = Review(rating=5, text='ok', author_id=other_id, target_user_id=owner_id, ad_id=ad_id)
+        db.session.add(review)
+        db.session.add(Message(body='hi', sender_id=other_id, recipient_id=owner_id, ad_id=ad_id))
+        db.session.execute(favorites.insert().values(user_id=other_id, ad_id=ad_id))
+        db.session.commit()
+        return ad_id, review.id
+
+
+@pytest.mark.parametrize('url', ['/api/ads/{}', '/api/admin/ads/{}'])
+def test_deleting_reviewed_ad_keeps_the_review(app, admin_client, url):
+    from models import db, Review
+
+    ad_id, review_id = create_ad_with_history(app, admin_client)
+
+    response = admin_client.delete(url.format(ad_id))
+
+    assert response.status_code in (200, 204), response.get_data(as_text=True)
+    with app.app_context():
+        assert db.session.get(Review, review_id).ad_id is None
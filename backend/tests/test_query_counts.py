@@ -0,0 +1,51 @@
+"""Listing endpoints must issue a fixed number of SQL statements per page.
+
+Counts come from the X-Query-Count header of the profiling middleware;
+response caches are dropped before each request so every call hits the
+database.
+"""
+import pytest
+
+from conftest import EMAIL_DOMAIN, login
+
+PAGE_SIZE = 20
+
+
+def statement_count(client, url):
+    from cache import invalidate_ad_caches
+
+    invalidate_ad_caches()
+    response = client.get(url)
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return int(response.headers['X-Query-Count'])
+
+
+def add_favorites(app, user_id, count):
+    from models import db, Ad, favorites
+
+    with app.app_context():
+        ad_ids = db.session.execute(db.select(Ad.id).order_by(Ad.id).limit(count)).scalars().all()
+        db.session.execute(favorites.delete().where(favorites.c.user_id == user_id))
+        db.session.execute(favorites.insert(), [{'user_id': user_id, 'ad_id': ad_id} for ad_id in ad_ids])
+        db.session.commit()
+
+
+@pytest.mark.parametrize('url', ['/api/ads?limit={}', '/api/admin/ads?limit={}'])
+def test_listing_query_count_does_not_grow_with_page_size(admin_client, url):
+    statement_count(admin_client, url.format(PAGE_SIZE))  # warm up the connection
+
+    single = statement_count(admin_client, url.format(1))
+    full_page = statement_count(admin_client, url.format(PAGE_SIZE))
+
+    assert single == full_page
+
+
+def test_favorites_query_count_does_not_grow_with_favorites(app):
+    one_client, one_user = login(app, f'seed2@{EMAIL_DOMAIN}')
+    many_client, many_user = login(app, f'seed3@{EMAIL_DOMAIN}')
+    add_favorites(app, one_user, 1)
+    add_favorites(app, many_user, PAGE_SIZE)
+    statement_count(one_client, '/api/favorites')
+
+    assert len(many_client.get('/api/favorites').get_json()) == PAGE_SIZE
+    assert statement_count(one_client, '/api/favorites') == statement_count(many_client, '/api/favorites')
@@ -0,0 +1,60 @@
+from models import AdPhoto, db
+from images import original_filename
+import os
+import time
+
+GC_BATCH_SIZE = 500
+
+
+def iter_upload_files(folder):
+    stack = [folder]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    yield entry
+
+
+def referenced_filenames(filenames):
+    return set(db.session.execute(
+        db.select(AdPhoto.image_filename).where(AdPhoto.image_filename.in_(filenames))
+    ).scalars())
+
+
+def collect_orphaned_uploads(folder, grace_seconds, dry_run=False, batch_size=GC_BATCH_SIZE):
+    cutoff = time.time() - grace_seconds
+    removed = reclaimed = scanned = 0
+
+    def process(batch):
+        nonlocal removed, reclaimed
+        referenced = referenced_filenames({original for _, original in batch})
+        for entry, original in batch:
+            if original in referenced:
+                continue
+            size = entry.stat().st_size
+            if not dry_run:
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    continue
+            removed += 1
+            reclaimed += size
+
+    batch = []
+    for entry in iter_upload_files(folder):
+        scanned += 1
+        if entry.stat().st_mtime >= cutoff:
+            continue
+        if entry.name.endswith('.tmp'):
+            batch.append((entry, None))
+        else:
+            batch.append((entry, original_filename(entry.name) or entry.name))
+        if len(batch) >= batch_size:
+            process(batch)
+            batch = []
+    if batch:
+        process(batch)
+
+    return scanned, removed, reclaimed
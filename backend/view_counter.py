@@ -0,0 +1,95 @@
+from models import Ad, db
+from cache import ad_detail_cache
+from collections import Counter
+import atexit
+import threading
+import time
+
+
+class ViewCounter:
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self._pending = Counter()
+        self._pending_total = 0
+        self._seen = {}
+        self._thread = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('VIEW_COUNTER_FLUSH_INTERVAL', 10)
+        app.config.setdefault('VIEW_COUNTER_FLUSH_THRESHOLD', 500)
+        app.config.setdefault('VIEW_COUNTER_DEDUP_SECONDS', 1800)
+        self.app = app
+        self.flush_interval = app.config['VIEW_COUNTER_FLUSH_INTERVAL']
+        self.flush_threshold = app.config['VIEW_COUNTER_FLUSH_THRESHOLD']
+        self.dedup_seconds = app.config['VIEW_COUNTER_DEDUP_SECONDS']
+        app.extensions['view_counter'] = self
+        atexit.register(self.flush)
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='view-counter-flush', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Ошибка сохранения просмотров: {e}")
+
+    def record(self, ad_id, viewer=None):
+        self.start()
+        now = time.monotonic()
+        with self._lock:
+            if viewer is not None and self.dedup_seconds:
+                key = (viewer, ad_id)
+                last_seen = self._seen.get(key)
+                if last_seen is not None and now - last_seen < self.dedup_seconds:
+                    return False
+                self._seen[key] = now
+            self._pending[ad_id] += 1
+            self._pending_total += 1
+            should_flush = self._pending_total >= self.flush_threshold
+
+        if should_flush:
+            self.flush()
+        return True
+
+    def pending(self, ad_id):
+        with self._lock:
+            return self._pending.get(ad_id, 0)
+
+    def flush(self):
+        with self._lock:
+            pending = self._pending
+            self._pending = Counter()
+            self._pending_total = 0
+            if self.dedup_seconds:
+                cutoff = time.monotonic() - self.dedup_seconds
+                self._seen = {key: seen for key, seen in self._seen.items() if seen >= cutoff}
+
+        if not pending:
+            return 0
+
+        with self.app.app_context():
+            try:
+                db.session.execute(
+                    db.update(Ad)
+                    .where(Ad.id.in_(list(pending)))
+                    .values(views=db.func.coalesce(Ad.views, 0) + db.case(pending, value=Ad.id, else_=0))
+                )
+                db.session.commit()
+                for ad_id in pending:
+                    ad_detail_cache.delete(ad_id)
+            except Exception:
+                db.session.rollback()
+                with self._lock:
+                    self._pending.update(pending)
+                    self._pending_total += sum(pending.values())
+                raise
+        return len(pending)